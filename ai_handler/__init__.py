@@ -3,25 +3,49 @@ import logging
 logger = logging.getLogger("ai_handler")
 logger.addHandler(logging.NullHandler()) 
 
-from ai_handler.cache import Cache, InMemoryCache, NullCache
+from ai_handler.cache import AnswerCache, Cache, CacheEntry, CacheStats, InMemoryCache, NullCache, RefreshPolicy
+from ai_handler.codec import Codec, CompressionCodec, CodecStats, train_dictionary
 from ai_handler.providers.ai_provider_client import AiProviderClient
-from ai_handler.question import Question, SimpleQuestion
-from ai_handler.answer import Answer, SimpleAnswer
-from ai_handler.errors import ClientError, ProviderError, InvalidModelResponseException, AiHandlerError
+from ai_handler.question import Question, SimpleQuestion, JsonQuestion
+from ai_handler.answer import Answer, SimpleAnswer, JsonAnswer
+from ai_handler.schema import JsonSchema, extract_json
+from ai_handler.errors import ClientError, ProviderError, InvalidModelResponseException, AiHandlerError, SchemaValidationError, DeadlineExceededError, RequestCancelledError, SchedulerOverloadedError
+from ai_handler.deadline import Deadline
+from ai_handler.scheduler import Priority, Scheduler, SchedulerMetrics
 from ai_handler.ai_handler import AiHandler
 
 __all__ = [
     "Cache",
+    "CacheEntry",
+    "CacheStats",
+    "AnswerCache",
     "InMemoryCache",
     "NullCache",
+    "RefreshPolicy",
+    "Codec",
+    "CompressionCodec",
+    "CodecStats",
+    "train_dictionary",
     "AiProviderClient",
     "Question",
     "SimpleQuestion",
+    "JsonQuestion",
     "Answer",
     "SimpleAnswer",
+    "JsonAnswer",
+    "JsonSchema",
+    "extract_json",
     "ClientError",
     "ProviderError",
     "InvalidModelResponseException",
     "AiHandlerError",
+    "SchemaValidationError",
+    "DeadlineExceededError",
+    "RequestCancelledError",
+    "Deadline",
+    "SchedulerOverloadedError",
+    "Priority",
+    "Scheduler",
+    "SchedulerMetrics",
     "AiHandler"
 ]
@@ -1,9 +1,21 @@
+import copy
+import threading
 import typing as t
+from concurrent.futures import Future, ThreadPoolExecutor
 import ai_handler.errors as ex
 from ai_handler.providers.ai_provider_client import AiProviderClient
 from ai_handler.question import Question, SimpleQuestion
-from ai_handler.answer import Answer, SimpleAnswer
-from ai_handler.cache import Cache, InMemoryCache
+from ai_handler.answer import Answer, JsonAnswer, SimpleAnswer
+from ai_handler.cache import (
+    AnswerCache,
+    Cache,
+    CacheEntry,
+    CacheStats,
+    InMemoryCache,
+    RefreshPolicy,
+)
+from ai_handler.deadline import Deadline
+from ai_handler.scheduler import Priority, Scheduler
 from ai_handler.errors import InvalidModelResponseException
 
 import logging
@@ -18,9 +30,22 @@ class AiHandler(t.Generic[T]):
         self,
         client: AiProviderClient,
         cache: t.Optional[Cache] = None,
+        refresh_policy: t.Optional[RefreshPolicy] = None,
+        scheduler: t.Optional[Scheduler] = None,
+        answer_cache: t.Optional[AnswerCache] = None,
     ):
         self.client = client
         self.cache = cache or InMemoryCache()
+        self.refresh_policy = refresh_policy
+        self.scheduler = scheduler
+        self.answer_cache = answer_cache
+        self._stats_lock = threading.Lock()
+        self._object_hits = 0
+        self._raw_hits = 0
+        self._misses = 0
+        self._refresh_lock = threading.Lock()
+        self._refreshes: dict[int, Future] = {}
+        self._refresh_executor: t.Optional[ThreadPoolExecutor] = None
 
     def ask(
         self,
@@ -28,29 +53,190 @@ class AiHandler(t.Generic[T]):
         *,
         answer_factory: t.Optional[t.Callable[[str], T]] = None,
         use_cache: bool = True,
+        timeout: t.Optional[float] = None,
+        deadline: t.Optional[Deadline] = None,
+        priority: int = Priority.DEFAULT,
+        tenant: t.Optional[str] = None,
         **kwargs,
     ) -> T:
+        """
+        Ask a question, serving it from the cache when possible.
+        ``timeout`` (seconds) or ``deadline`` bounds the whole call across retries
+        and provider failover; ``deadline`` can also be cancelled from another thread.
+        ``priority`` and ``tenant`` are used by the scheduler, if one is configured.
+        """
+        if deadline is None and timeout is not None:
+            deadline = Deadline(timeout)
         if isinstance(question, str):
             question = SimpleQuestion(question)
         if answer_factory is None:
-            answer_factory = SimpleAnswer
-        raw = None
-        if self.cache and use_cache:
-            raw = self.cache.get(question)
-        if raw is not None:
-            return answer_factory(raw)
-        answer = self._ask(question, answer_factory, **kwargs)
-        if self.cache and use_cache:
-            self.cache.set(question, answer.raw)
+            answer_factory = default_answer_factory(question)
+        if not (self.cache and use_cache):
+            return self._ask(
+                question,
+                answer_factory,
+                deadline=deadline,
+                priority=priority,
+                tenant=tenant,
+                **kwargs,
+            )
+        key = self.cache.question_key(question)
+        version = None
+        if self.answer_cache is not None:
+            # read before the raw entry: a write racing with this call can then only
+            # make a parsed answer look older than it is, never newer
+            version = self.cache.version(question)
+            hit = self.answer_cache.get(key, answer_factory, version)
+            if hit is not None and self._servable(
+                hit[1], question, answer_factory, kwargs
+            ):
+                self._count("_object_hits")
+                return hit[0]
+        entry = self._cached_entry(question)
+        if entry is not None and self._servable(
+            entry.stored_at, question, answer_factory, kwargs
+        ):
+            self._count("_raw_hits")
+            answer = answer_factory(entry.raw)
+            if self.answer_cache is not None:
+                self.answer_cache.set(
+                    key, answer_factory, answer, version, entry.stored_at
+                )
+            return answer
+        self._count("_misses")
+        answer = self._ask(
+            question,
+            answer_factory,
+            deadline=deadline,
+            priority=priority,
+            tenant=tenant,
+            **kwargs,
+        )
+        stored_at = self._store(key, question, answer.raw)
+        if self.answer_cache is not None:
+            self.answer_cache.set(
+                key, answer_factory, answer, self.cache.version(question), stored_at
+            )
         return answer
 
+    @property
+    def cache_stats(self) -> CacheStats:
+        with self._stats_lock:
+            return CacheStats(self._object_hits, self._raw_hits, self._misses)
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Stop the background refresh workers, optionally waiting for running refreshes.
+        """
+        with self._refresh_lock:
+            executor, self._refresh_executor = self._refresh_executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _count(self, counter: str) -> None:
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _cached_entry(self, question: Question) -> t.Optional[CacheEntry]:
+        if self.refresh_policy is not None:
+            return self.cache.get_entry(question)
+        raw = self.cache.get(question)
+        return CacheEntry(raw) if raw is not None else None
+
+    def _servable(
+        self,
+        stored_at: t.Optional[float],
+        question: Question,
+        answer_factory: t.Callable[[str], T],
+        kwargs: dict,
+    ) -> bool:
+        """
+        Whether a cached answer may be served, scheduling a refresh if it is stale.
+        """
+        policy = self.refresh_policy
+        if policy is None or stored_at is None:
+            return True
+        age = policy.clock() - stored_at
+        if age <= policy.fresh_ttl:
+            return True
+        if age <= policy.stale_ttl:
+            self._schedule_refresh(question, answer_factory, kwargs)
+            return True
+        return False
+
+    def _store(self, key: int, question: Question, raw: str) -> t.Optional[float]:
+        stored_at = None
+        if self.refresh_policy is None:
+            self.cache.set(question, raw)
+        else:
+            stored_at = self.refresh_policy.clock()
+            self.cache.set_entry(question, CacheEntry(raw, stored_at))
+        if self.answer_cache is not None:
+            # versions already reject the old answers; this just frees them early
+            self.answer_cache.invalidate(key)
+        return stored_at
+
+    def _schedule_refresh(
+        self, question: Question, answer_factory: t.Callable[[str], T], kwargs: dict
+    ) -> None:
+        policy = self.refresh_policy
+        key = self.cache.question_key(question)
+        with self._refresh_lock:
+            if key in self._refreshes:
+                return
+            if len(self._refreshes) >= policy.max_pending_refreshes:
+                logger.debug("Refresh queue is full, serving stale answer without refresh.")
+                return
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(
+                    max_workers=policy.max_concurrent_refreshes,
+                    thread_name_prefix="ai_handler-refresh",
+                )
+            self._refreshes[key] = self._refresh_executor.submit(
+                self._refresh, key, copy.copy(question), answer_factory, dict(kwargs)
+            )
+
+    def _refresh(
+        self,
+        key: int,
+        question: Question,
+        answer_factory: t.Callable[[str], T],
+        kwargs: dict,
+    ) -> None:
+        try:
+            answer = self._ask(question, answer_factory, priority=Priority.BULK, **kwargs)
+            self._store(key, question, answer.raw)
+        except Exception as e:
+            logger.warning(f"Background refresh failed, keeping stale answer: {e}")
+        finally:
+            with self._refresh_lock:
+                self._refreshes.pop(key, None)
+
     def _ask(
-        self, question: Question, answer_factory: t.Callable[[str], T], **kwargs
+        self,
+        question: Question,
+        answer_factory: t.Callable[[str], T],
+        deadline: t.Optional[Deadline] = None,
+        priority: int = Priority.DEFAULT,
+        tenant: t.Optional[str] = None,
+        **kwargs,
     ) -> T:
+        # retries rewrite the prompt of the question they are given; work on a copy
+        # so the caller's question keeps hashing to the key its answer is stored under
+        question = copy.copy(question)
         retries = 0
+        if deadline is not None:
+            kwargs["deadline"] = deadline
         while True:
+            client_response = None
+            if deadline is not None:
+                deadline.check()
             try:
-                client_response = self.client.ask(question.prompt, **kwargs)
+                if question.response_schema is not None:
+                    kwargs["response_schema"] = question.response_schema.schema
+                client_response = self._client_ask(
+                    question.prompt, priority, tenant, deadline, kwargs
+                )
                 return transform(
                     lambda: answer_factory(client_response),
                     to_catch=question.factory_retry_exceptions,
@@ -64,11 +250,39 @@ class AiHandler(t.Generic[T]):
                 retry_transformer = question.on_retry
                 if not retry_transformer or retries >= question.max_retries:
                     raise e
+                if deadline is not None:
+                    deadline.check()
                 if question := retry_transformer(e, retries):
                     retries += 1
                     continue
                 raise e
 
+    def _client_ask(
+        self,
+        prompt: str,
+        priority: int,
+        tenant: t.Optional[str],
+        deadline: t.Optional[Deadline],
+        kwargs: dict,
+    ) -> str:
+        if self.scheduler is None:
+            return self.client.ask(prompt, **kwargs)
+        return self.scheduler.run(
+            lambda: self.client.ask(prompt, **kwargs),
+            priority=priority,
+            tenant=tenant,
+            deadline=deadline,
+        )
+
+
+def default_answer_factory(question: Question) -> t.Callable[[str], Answer]:
+    """
+    Schema-bound JsonAnswer for questions with a response schema, else SimpleAnswer.
+    """
+    if question.response_schema is not None:
+        return JsonAnswer.for_schema(question.response_schema)
+    return SimpleAnswer
+
 
 def transform(
     factory: t.Callable[[], T],
@@ -1,9 +1,17 @@
 from __future__ import annotations
 
 from abc import ABC
+import threading
+import typing as t
+
+from ai_handler.schema import JsonSchema, compile_schema, extract_json
 
 
 class Answer(ABC):
+    #: Set to True on answer types whose instances are never mutated after
+    #: construction, so AnswerCache may hand the same instance to every caller.
+    immutable: t.ClassVar[bool] = False
+
     def __init__(self, raw: str):
         self.raw = raw
 
@@ -22,7 +30,6 @@ class Answer(ABC):
         self._raw = value
 
 
-
 class SimpleAnswer(Answer):
     """
     Simple answer that just wraps the raw string.
@@ -30,3 +37,53 @@ class SimpleAnswer(Answer):
 
     def __init__(self, raw: str):
         super().__init__(raw.strip())
+
+
+class JsonAnswer(Answer):
+    """
+    Answer holding a JSON value extracted from the raw response.
+
+    Subclasses set ``schema`` to a JSON schema dict; it is compiled once when
+    the subclass is created and reused to validate every answer.
+    Extraction tolerates prose and code fences around the JSON so that
+    wrapped responses do not trigger a retry.
+    """
+
+    schema: t.ClassVar[t.Optional[JsonSchema | dict[str, t.Any]]] = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.__dict__.get("schema") is not None:
+            cls.schema = compile_schema(cls.schema)
+
+    def __init__(self, raw: str):
+        super().__init__(raw.strip())
+        self.data = extract_json(self.raw, self.schema)
+
+    @classmethod
+    def with_schema(
+        cls, schema: JsonSchema | dict[str, t.Any], name: str = "SchemaJsonAnswer"
+    ) -> type[JsonAnswer]:
+        """
+        Create a JsonAnswer subclass bound to the given schema.
+        """
+        return type(name, (cls,), {"schema": compile_schema(schema)})
+
+    @classmethod
+    def for_schema(cls, schema: JsonSchema | dict[str, t.Any]) -> type[JsonAnswer]:
+        """
+        Return the JsonAnswer subclass bound to an equal schema, creating it once.
+        Reusing one class per schema keeps the factory identity stable for AnswerCache.
+        """
+        schema = compile_schema(schema)
+        key = (cls, schema)
+        with _schema_answer_types_lock:
+            answer_type = _schema_answer_types.get(key)
+            if answer_type is None:
+                answer_type = cls.with_schema(schema)
+                _schema_answer_types[key] = answer_type
+            return answer_type
+
+
+_schema_answer_types: dict[tuple[type[JsonAnswer], JsonSchema], type[JsonAnswer]] = {}
+_schema_answer_types_lock = threading.Lock()
@@ -1,13 +1,76 @@
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+import copy
+import itertools
+import threading
+import time
 import typing as t
+from ai_handler.answer import Answer
+from ai_handler.codec import Codec
 from ai_handler.question import Question
 
 
+@dataclass(frozen=True)
+class CacheEntry:
+    """
+    A cached raw answer with the wall-clock time it was stored.
+    ``stored_at`` is None when the backend does not track it.
+    """
+
+    raw: str
+    stored_at: t.Optional[float] = None
+
+
+@dataclass(frozen=True)
+class RefreshPolicy:
+    """
+    Stale-while-revalidate settings for AiHandler.
+
+    Entries younger than ``fresh_ttl`` seconds are served as is. Entries younger
+    than ``stale_ttl`` are served immediately while a background refresh re-asks
+    the provider. Older entries are treated as misses. Entries without a
+    ``stored_at``, e.g. written directly with Cache.set, are always served.
+    """
+
+    fresh_ttl: float
+    stale_ttl: float
+    max_concurrent_refreshes: int = 4
+    max_pending_refreshes: int = 64
+    clock: t.Callable[[], float] = time.time
+
+    def __post_init__(self):
+        if self.stale_ttl < self.fresh_ttl:
+            raise ValueError("stale_ttl must not be shorter than fresh_ttl")
+        if self.max_concurrent_refreshes < 1:
+            raise ValueError("max_concurrent_refreshes must be at least 1")
+
+
 class Cache(ABC):
     """
     Abstract base class for a cache used by AiHandler.
+    Backends store ``encode_value`` output and return ``decode_value`` of it,
+    so an optional codec (e.g. CompressionCodec) applies to any backend.
     """
 
+    codec: t.Optional[Codec] = None
+
+    def encode_value(self, raw_answer: str) -> str | bytes:
+        """
+        Convert a raw answer to the form stored by the backend.
+        """
+        if self.codec is None:
+            return raw_answer
+        return self.codec.encode(raw_answer)
+
+    def decode_value(self, value: str | bytes) -> str:
+        """
+        Convert a stored value back to the raw answer. Only called on a hit.
+        """
+        if self.codec is None or isinstance(value, str):
+            return value
+        return self.codec.decode(value)
+
     @staticmethod
     def question_key(question: Question) -> int:
         """
@@ -31,20 +94,73 @@ class Cache(ABC):
         """
         ...
 
+    def set_entry(self, question: Question, entry: CacheEntry) -> None:
+        """
+        Store an entry with its timestamp.
+        Override in backends that can persist ``stored_at``; the default drops it.
+        """
+        self.set(question, entry.raw)
+
+    def get_entry(self, question: Question) -> t.Optional[CacheEntry]:
+        """
+        Retrieve the cached entry for a given question, or None if not present.
+        """
+        raw = self.get(question)
+        if raw is None:
+            return None
+        return CacheEntry(raw)
+
+    def version(self, question: Question) -> t.Optional[t.Hashable]:
+        """
+        Identify the entry currently stored for a question without reading it,
+        e.g. a generation counter or an ETag. Must change whenever the entry is
+        rewritten and be None when there is no entry.
+        AnswerCache only serves parsed answers for backends that override this;
+        the default None keeps every lookup on the raw cache.
+        """
+        return None
+
 class InMemoryCache(Cache):
     """
     Simple in-memory cache using Python's dict.
     Not persistent across runs.
     """
 
-    def __init__(self):
-        self._store: dict[int, str] = {}
+    def __init__(self, codec: t.Optional[Codec] = None):
+        self.codec = codec
+        self._store: dict[int, str | bytes] = {}
+        self._stored_at: dict[int, float] = {}
+        self._versions: dict[int, int] = {}
+        self._generation = itertools.count(1)
 
     def set(self, question: Question, raw_answer: str) -> None:
-        self._store[self.question_key(question)] = raw_answer
+        # no timestamp: this cache cannot know which clock a RefreshPolicy uses
+        self.set_entry(question, CacheEntry(raw_answer))
 
     def get(self, question: Question) -> t.Optional[str]:
-        return self._store.get(self.question_key(question))
+        value = self._store.get(self.question_key(question))
+        if value is None:
+            return None
+        return self.decode_value(value)
+
+    def set_entry(self, question: Question, entry: CacheEntry) -> None:
+        key = self.question_key(question)
+        self._store[key] = self.encode_value(entry.raw)
+        if entry.stored_at is None:
+            self._stored_at.pop(key, None)
+        else:
+            self._stored_at[key] = entry.stored_at
+        self._versions[key] = next(self._generation)
+
+    def get_entry(self, question: Question) -> t.Optional[CacheEntry]:
+        key = self.question_key(question)
+        value = self._store.get(key)
+        if value is None:
+            return None
+        return CacheEntry(self.decode_value(value), self._stored_at.get(key))
+
+    def version(self, question: Question) -> t.Optional[int]:
+        return self._versions.get(self.question_key(question))
 
 class NullCache(Cache):
     """
@@ -56,3 +172,116 @@ class NullCache(Cache):
 
     def get(self, question: Question) -> None:
         return None
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """
+    Cache hit counters of an AiHandler.
+    ``object_hits`` skipped parsing entirely, ``raw_hits`` re-ran the answer factory.
+    """
+
+    object_hits: int = 0
+    raw_hits: int = 0
+    misses: int = 0
+
+
+class AnswerCache:
+    """
+    Bounded LRU cache of constructed Answer objects, keyed by
+    (question key, answer factory). It sits in front of the raw string cache
+    so hot keys skip re-parsing.
+
+    Instances of answer types declaring ``immutable = True`` are shared between
+    callers. Other answers are only cached with ``copy_on_read``, in which case
+    every hit returns a deep copy. Factories are matched by identity, so pass
+    the same class or function on every call for hits.
+
+    Entries are tagged with the raw entry's ``version`` (see Cache.version) and a
+    lookup with a different version is a miss, so writes to the raw cache made
+    anywhere, including other processes sharing a backend, are never masked.
+    A None version means there is no raw entry to check against: lookups miss
+    and nothing is stored.
+    """
+
+    def __init__(self, max_size: int = 1024, copy_on_read: bool = False):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.copy_on_read = copy_on_read
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[
+            tuple[int, t.Callable],
+            tuple[Answer, t.Optional[float], t.Optional[t.Hashable]],
+        ] = OrderedDict()
+        self._factories: dict[int, set[t.Callable]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def cacheable(self, answer: Answer) -> bool:
+        return type(answer).immutable or self.copy_on_read
+
+    def get(
+        self, key: int, factory: t.Callable, version: t.Optional[t.Hashable]
+    ) -> t.Optional[tuple[Answer, t.Optional[float]]]:
+        """
+        Return (answer, stored_at) for a hit, or None.
+        An entry parsed from a different raw ``version`` is dropped and misses.
+        """
+        if version is None:
+            return None
+        with self._lock:
+            entry = self._entries.get((key, factory))
+            if entry is None:
+                return None
+            if entry[2] != version:
+                del self._entries[(key, factory)]
+                self._forget_factory(key, factory)
+                return None
+            self._entries.move_to_end((key, factory))
+        answer, stored_at, _ = entry
+        if not type(answer).immutable:
+            answer = copy.deepcopy(answer)
+        return answer, stored_at
+
+    def set(
+        self,
+        key: int,
+        factory: t.Callable,
+        answer: Answer,
+        version: t.Optional[t.Hashable],
+        stored_at: t.Optional[float] = None,
+    ) -> None:
+        if version is None or not self.cacheable(answer):
+            return
+        if not type(answer).immutable:
+            answer = copy.deepcopy(answer)
+        with self._lock:
+            self._entries[(key, factory)] = (answer, stored_at, version)
+            self._entries.move_to_end((key, factory))
+            self._factories.setdefault(key, set()).add(factory)
+            while len(self._entries) > self.max_size:
+                (old_key, old_factory), _ = self._entries.popitem(last=False)
+                self._forget_factory(old_key, old_factory)
+
+    def invalidate(self, key: int) -> None:
+        """
+        Drop the parsed answers of every factory for a question key.
+        """
+        with self._lock:
+            for factory in self._factories.pop(key, ()):
+                self._entries.pop((key, factory), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._factories.clear()
+
+    def _forget_factory(self, key: int, factory: t.Callable) -> None:
+        factories = self._factories.get(key)
+        if factories is None:
+            return
+        factories.discard(factory)
+        if not factories:
+            del self._factories[key]
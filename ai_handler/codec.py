@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import lzma
+import re
+import threading
+import time
+import typing as t
+import zlib
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass
+
+_RAW = 0
+_ZLIB = 1
+_ZLIB_DICT = 2
+_LZMA = 3
+
+_BOUNDARY_RE = re.compile(rb'[\s,:{}\[\]"]+')
+_WINDOWS = (8, 16, 32, 48)
+
+
+@dataclass
+class CodecStats:
+    """
+    Running totals for a codec. ``ratio`` is raw bytes over stored bytes.
+    """
+
+    encoded: int = 0
+    compressed: int = 0
+    decoded: int = 0
+    raw_bytes: int = 0
+    stored_bytes: int = 0
+    encode_seconds: float = 0.0
+    decode_seconds: float = 0.0
+
+    @property
+    def ratio(self) -> float:
+        if not self.stored_bytes:
+            return 1.0
+        return self.raw_bytes / self.stored_bytes
+
+
+class Codec(ABC):
+    """
+    Converts cached answers to and from their stored form.
+    """
+
+    @abstractmethod
+    def encode(self, value: str) -> bytes:
+        """
+        Convert a raw answer to its stored form.
+        """
+        ...
+
+    @abstractmethod
+    def decode(self, data: bytes) -> str:
+        """
+        Convert a stored value back to the raw answer.
+        """
+        ...
+
+
+class CompressionCodec(Codec):
+    """
+    Compresses values with zlib or lzma once they reach ``threshold`` bytes.
+    Smaller values, and values that do not shrink, are stored as plain UTF-8.
+
+    A shared zlib ``dictionary`` (see train_dictionary) greatly improves the
+    ratio for short, repetitive answers. Stored values record which dictionary
+    they were compressed with, so decoding with a different one fails loudly.
+    """
+
+    def __init__(
+        self,
+        algorithm: t.Literal["zlib", "lzma"] = "zlib",
+        level: t.Optional[int] = None,
+        threshold: int = 256,
+        dictionary: t.Optional[bytes] = None,
+    ):
+        if algorithm not in ("zlib", "lzma"):
+            raise ValueError(f"Unsupported compression algorithm: {algorithm}")
+        if dictionary is not None and algorithm != "zlib":
+            raise ValueError("Compression dictionaries are only supported with zlib")
+        self.algorithm = algorithm
+        self.level = level
+        self.threshold = threshold
+        self.dictionary = dictionary
+        self._dictionary_id = (
+            zlib.crc32(dictionary).to_bytes(4, "big") if dictionary is not None else b""
+        )
+        self._stats = CodecStats()
+        self._stats_lock = threading.Lock()
+
+    @property
+    def stats(self) -> CodecStats:
+        with self._stats_lock:
+            return CodecStats(**vars(self._stats))
+
+    def encode(self, value: str) -> bytes:
+        start = time.perf_counter()
+        raw = value.encode("utf-8")
+        data = None
+        if len(raw) >= self.threshold:
+            data = self._compress(raw)
+            if len(data) >= len(raw) + 1:
+                data = None
+        if data is None:
+            data = bytes((_RAW,)) + raw
+        elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            self._stats.encoded += 1
+            self._stats.compressed += data[0] != _RAW
+            self._stats.raw_bytes += len(raw)
+            self._stats.stored_bytes += len(data)
+            self._stats.encode_seconds += elapsed
+        return data
+
+    def decode(self, data: bytes) -> str:
+        start = time.perf_counter()
+        tag, body = data[0], memoryview(data)[1:]
+        if tag == _RAW:
+            raw = bytes(body)
+        elif tag == _ZLIB:
+            raw = zlib.decompress(body)
+        elif tag == _ZLIB_DICT:
+            if bytes(body[:4]) != self._dictionary_id:
+                raise ValueError("Value was compressed with a different dictionary")
+            decompressor = zlib.decompressobj(zdict=self.dictionary)
+            raw = decompressor.decompress(body[4:]) + decompressor.flush()
+        elif tag == _LZMA:
+            raw = lzma.decompress(body)
+        else:
+            raise ValueError(f"Unknown codec tag: {tag}")
+        value = raw.decode("utf-8")
+        elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            self._stats.decoded += 1
+            self._stats.decode_seconds += elapsed
+        return value
+
+    def _compress(self, raw: bytes) -> bytes:
+        if self.algorithm == "lzma":
+            preset = self.level if self.level is not None else 6
+            return bytes((_LZMA,)) + lzma.compress(raw, preset=preset)
+        level = self.level if self.level is not None else zlib.Z_DEFAULT_COMPRESSION
+        if self.dictionary is None:
+            return bytes((_ZLIB,)) + zlib.compress(raw, level)
+        compressor = zlib.compressobj(level, zdict=self.dictionary)
+        body = compressor.compress(raw) + compressor.flush()
+        return bytes((_ZLIB_DICT,)) + self._dictionary_id + body
+
+
+def train_dictionary(samples: t.Iterable[str], size: int = 16 * 1024) -> bytes:
+    """
+    Build a zlib dictionary from sample answers.
+    Counts substrings starting at token boundaries (JSON keys, repeated phrases)
+    and keeps those that save the most bytes across samples, placing the most
+    valuable last where zlib finds them at the shortest distance.
+    """
+    counts: Counter[bytes] = Counter()
+    for sample in samples:
+        raw = sample.encode("utf-8")
+        starts = [0] + [m.end() for m in _BOUNDARY_RE.finditer(raw)]
+        for start in starts:
+            for width in _WINDOWS:
+                if start + width <= len(raw):
+                    counts[raw[start : start + width]] += 1
+    scored = sorted(
+        (chunk for chunk, count in counts.items() if count > 1),
+        key=lambda chunk: counts[chunk] * len(chunk),
+        reverse=True,
+    )
+    chosen: list[bytes] = []
+    total = 0
+    for chunk in scored:
+        if total + len(chunk) > size or any(chunk in kept for kept in chosen):
+            continue
+        chosen.append(chunk)
+        total += len(chunk)
+    return b"".join(reversed(chosen))
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+import typing as t
+
+import ai_handler.errors as ex
+
+
+class Deadline:
+    """
+    End-to-end time budget and cancellation flag for one request.
+
+    The same Deadline is passed through the handler, retries, provider failover
+    and SDK calls; each step checks it and sizes its own timeout from what remains.
+    ``cancel()`` may be called from any thread. Cancellation is cooperative: it
+    takes effect at the next check, not in the middle of a blocking SDK call.
+    """
+
+    def __init__(
+        self,
+        timeout: t.Optional[float] = None,
+        clock: t.Callable[[], float] = time.monotonic,
+    ):
+        self.clock = clock
+        self.expires_at = clock() + timeout if timeout is not None else None
+        self._cancelled = threading.Event()
+
+    def remaining(self) -> t.Optional[float]:
+        """
+        Seconds left, never negative. None if the deadline is unbounded.
+        """
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - self.clock())
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and self.clock() >= self.expires_at
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def check(self) -> None:
+        """
+        Raise RequestCancelledError or DeadlineExceededError if work should stop.
+        """
+        if self.cancelled:
+            raise ex.RequestCancelledError("The request was cancelled.")
+        if self.expired:
+            raise ex.DeadlineExceededError("The request deadline was exceeded.")
+
+    def timeout(self, default: t.Optional[float] = None) -> t.Optional[float]:
+        """
+        Timeout for the next attempt: the smaller of ``default`` and the time remaining.
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        if default is None:
+            return remaining
+        return min(default, remaining)
+
+    def timeout_ms(self, default: t.Optional[float] = None) -> t.Optional[int]:
+        timeout = self.timeout(default)
+        if timeout is None:
+            return None
+        # a zero timeout means "no timeout" to some SDKs
+        return max(1, math.ceil(timeout * 1000))
+
+    def wait(self, seconds: t.Optional[float] = None) -> bool:
+        """
+        Block until cancelled, the deadline passes or ``seconds`` elapse.
+        Returns True if cancelled.
+        """
+        timeout = self.timeout(seconds)
+        return self._cancelled.wait(timeout)
@@ -22,3 +22,29 @@ class InvalidModelResponseException(ClientError):
     def __init__(self, origin: str | Exception, message: str = None):
         self.origin = origin
         super().__init__(message or "The AI model returned an invalid response.")
+
+
+class SchemaValidationError(AiHandlerError, ValueError):
+    """Raised when a decoded answer does not match its JSON schema."""
+
+    def __init__(self, path: str, message: str):
+        self.path = path
+        super().__init__(f"{path}: {message}")
+
+
+class DeadlineExceededError(AiHandlerError, TimeoutError):
+    """Raised when a request's deadline passes before it completes."""
+
+    pass
+
+
+class RequestCancelledError(AiHandlerError):
+    """Raised when a request is cancelled through its Deadline."""
+
+    pass
+
+
+class SchedulerOverloadedError(AiHandlerError):
+    """Raised when the scheduler sheds a request because its queue wait would be too long."""
+
+    pass
@@ -1,12 +1,152 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
+import math
 import typing as t
 
 
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count (about four characters per token) used when no tokenizer is given.
+    """
+    return math.ceil(len(text) / 4)
+
+
+@dataclass
+class ChatMessage:
+    role: str
+    text: str
+    pinned: bool = False
+
+
+@dataclass(frozen=True)
+class HistoryPolicy:
+    """
+    Bounds on the history re-sent with every chat turn.
+
+    ``max_turns`` counts unpinned user/model exchanges and ``max_tokens`` counts
+    the whole window including pinned messages, the running summary and the new prompt.
+    With ``summarize`` set, dropped turns are folded into a running summary; the
+    window is then trimmed to ``summarize_ratio`` of its limits so the summarizer
+    runs once per batch of turns rather than on every turn.
+    """
+
+    max_turns: t.Optional[int] = None
+    max_tokens: t.Optional[int] = None
+    summarize: bool = False
+    summarize_ratio: float = 0.5
+    token_counter: t.Callable[[str], int] = estimate_tokens
+
+
+Summarizer = t.Callable[[str, list[ChatMessage]], str]
+
+
+class ChatHistory:
+    """
+    Conversation history bounded by a HistoryPolicy.
+    Pinned messages are never dropped; everything else ages out oldest first.
+    """
+
+    def __init__(
+        self, policy: HistoryPolicy, summarizer: t.Optional[Summarizer] = None
+    ):
+        if policy.summarize and summarizer is None:
+            raise ValueError("A summarizer is required when the policy summarizes")
+        self.policy = policy
+        self.summarizer = summarizer
+        self.messages: list[ChatMessage] = []
+        self.summary = ""
+
+    def add(self, role: str, text: str, pinned: bool = False) -> ChatMessage:
+        message = ChatMessage(role, text, pinned)
+        self.messages.append(message)
+        return message
+
+    def pin(self, text: str, role: str = "user") -> ChatMessage:
+        return self.add(role, text, pinned=True)
+
+    def window(self) -> list[ChatMessage]:
+        return list(self.messages)
+
+    def tokens(self, prompt: str = "") -> int:
+        count = self.policy.token_counter
+        total = sum(count(m.text) for m in self.messages)
+        if self.summary:
+            total += count(self.summary)
+        if prompt:
+            total += count(prompt)
+        return total
+
+    def compact(self, prompt: str = "", summarize: bool = True) -> list[ChatMessage]:
+        """
+        Drop the oldest unpinned turns until the window plus ``prompt`` fits the policy.
+        Returns the dropped messages, after folding them into the summary if enabled
+        and ``summarize`` is set. If the summarizer raises, the window is left
+        unchanged and the error propagates.
+        """
+        if not self._over_limit(prompt, 1.0):
+            return []
+        summarize = summarize and self.policy.summarize
+        ratio = self.policy.summarize_ratio if summarize else 1.0
+        messages = list(self.messages)
+        dropped: list[ChatMessage] = []
+        while self._over_limit(prompt, ratio):
+            turn = self._pop_oldest_turn()
+            if not turn:
+                break
+            dropped.extend(turn)
+        if dropped and summarize:
+            try:
+                self.summary = self.summarizer(self.summary, dropped)
+            except Exception:
+                self.messages[:] = messages
+                raise
+        return dropped
+
+    def _turns(self) -> int:
+        return sum(1 for m in self.messages if not m.pinned and m.role == "user")
+
+    def _over_limit(self, prompt: str, ratio: float) -> bool:
+        policy = self.policy
+        # the incoming prompt starts a new turn
+        turns = self._turns() + (1 if prompt else 0)
+        if policy.max_turns is not None and turns > max(1, int(policy.max_turns * ratio)):
+            return True
+        if policy.max_tokens is not None:
+            return self.tokens(prompt) > policy.max_tokens * ratio
+        return False
+
+    def _pop_oldest_turn(self) -> list[ChatMessage]:
+        for index, message in enumerate(self.messages):
+            if message.pinned:
+                continue
+            turn = [self.messages.pop(index)]
+            if (
+                turn[0].role == "user"
+                and index < len(self.messages)
+                and not self.messages[index].pinned
+                and self.messages[index].role != "user"
+            ):
+                turn.append(self.messages.pop(index))
+            return turn
+        return []
+
+
 class AIChat(ABC):
 
-    def __init__(self, chat_id: str):
+    def __init__(self, chat_id: str, history: t.Optional[ChatHistory] = None):
         self.chat_id = chat_id
+        self.history = history
+
+    def pin(self, text: str, role: str = "user") -> ChatMessage:
+        """
+        Add a message that is re-sent with every turn and never dropped from history.
+        """
+        if self.history is None:
+            raise NotImplementedError(
+                "Pinned messages require a chat created with a history policy."
+            )
+        return self.history.pin(text, role)
 
     @abstractmethod
     def ask(self, prompt: str, **kwargs) -> str:
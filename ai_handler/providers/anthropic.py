@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import typing as t
+from logging import getLogger
+from ai_handler.providers.ai_provider_client import AiProviderClient
+import ai_handler.errors as ex
+from ai_handler.deadline import Deadline
+
+logger = getLogger("ai_handler")
+
+
+class Anthropic(AiProviderClient):
+    def __init__(
+        self,
+        default_model: str,
+        api_key: str,
+        backup_models: t.Optional[list[str]] = None,
+        default_sys_instructions: t.Optional[str] = None,
+        default_temperature: t.Optional[float] = None,
+        default_limit_tokens: int = 4096,
+    ):
+        try:
+            import anthropic
+
+            self.anthropic = anthropic
+        except ImportError as e:
+            raise ImportError(
+                "The Anthropic provider requires the 'anthropic' package. "
+                "Install it with 'pip install ai_handler[anthropic]'"
+            ) from e
+        self.default_model = default_model
+        self.backup_models = list(backup_models or [])
+        self.api_key = api_key
+        self.default_sys_instructions = default_sys_instructions or ""
+        self.default_temperature = default_temperature
+        self.default_limit_tokens = default_limit_tokens
+        self.client = anthropic.Anthropic(api_key=api_key)
+
+    def get_request(
+        self,
+        prompt: str,
+        temperature: t.Optional[float] = None,
+        system_instructions: t.Optional[str] = None,
+        limit_tokens: t.Optional[int] = None,
+    ) -> dict[str, t.Any]:
+        request: dict[str, t.Any] = {
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": (
+                limit_tokens if limit_tokens is not None else self.default_limit_tokens
+            ),
+        }
+        temperature = (
+            temperature if temperature is not None else self.default_temperature
+        )
+        if temperature is not None:
+            request["temperature"] = temperature
+        system = system_instructions or self.default_sys_instructions
+        if system:
+            request["system"] = system
+        return request
+
+    def ask(
+        self,
+        prompt: str,
+        model: t.Optional[str] = None,
+        temperature: t.Optional[float] = None,
+        system_instructions: t.Optional[str] = None,
+        limit_tokens: t.Optional[int] = None,
+        use_backups: bool = True,
+        response_schema: t.Optional[dict[str, t.Any]] = None,
+        deadline: t.Optional[Deadline] = None,
+    ) -> str:
+        """
+        The Messages API has no JSON mode here, so ``response_schema`` is accepted
+        for interface parity and the schema is left to the prompt.
+        """
+        logger.debug(f"Asking Anthropic with prompt: {prompt}")
+        if model is None:
+            model = self.default_model
+        if use_backups and self.backup_models:
+            models = [model] + [m for m in self.backup_models if m != model]
+        else:
+            models = [model]
+        request = self.get_request(
+            prompt,
+            temperature=temperature,
+            system_instructions=system_instructions,
+            limit_tokens=limit_tokens,
+        )
+        client = self.client
+        if deadline is not None:
+            # each SDK retry would get the full remaining time again
+            client = client.with_options(max_retries=0)
+        for model in models:
+            if deadline is not None:
+                deadline.check()
+                timeout = deadline.timeout()
+                if timeout is not None:
+                    request["timeout"] = timeout
+            try:
+                response = client.messages.create(model=model, **request)
+                return "".join(
+                    block.text for block in response.content if block.type == "text"
+                )
+            except self.anthropic.APIStatusError as e:
+                if deadline is not None:
+                    deadline.check()
+                if e.status_code >= 500:
+                    logger.warning(f"Model {model} is unavailable, trying next model.")
+                    continue
+                logger.error(f"API error with model {model}: {e}")
+                raise ex.ProviderError(
+                    f"API error while asking with model {model}: {e}"
+                ) from e
+            except Exception as e:
+                if deadline is not None:
+                    deadline.check()
+                logger.error(f"Unexpected error with model {model}: {e}")
+                raise ex.ProviderError(
+                    f"Unexpected error while asking with model {model}: {e}"
+                ) from e
+        logger.error("All models are unavailable or failed to respond.")
+        raise ex.ProviderError("All models are unavailable or failed to respond.")
@@ -1,20 +1,87 @@
 from __future__ import annotations
 
 import uuid
+import threading
 import typing as t
+from dataclasses import dataclass
 from logging import getLogger
 from ai_handler.providers.ai_provider_client import AiProviderClient
 from ai_handler.providers.ai_provider_client import AIChat
+from ai_handler.providers.ai_provider_client import ChatHistory, ChatMessage, HistoryPolicy
 import ai_handler.errors as ex
+from ai_handler.deadline import Deadline
 from enum import Enum
 
 if t.TYPE_CHECKING:
-    from google.genai.types import GenerateContentConfig
+    from google import genai
+    from google.genai.types import GenerateContentConfig, HttpOptions
     from google.genai.chats import Chat as GenaiChat
 
 logger = getLogger("ai_handler")
 
 
+@dataclass(frozen=True)
+class GeminiConnectionOptions:
+    """
+    HTTP connection pool settings for the underlying genai client.
+    Instances are hashable so they can key shared clients.
+    """
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: t.Optional[float] = 30.0
+    timeout: t.Optional[float] = None
+    base_url: t.Optional[str] = None
+
+    def http_options(self) -> HttpOptions:
+        import httpx
+        from google.genai.types import HttpOptions
+
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+        return HttpOptions(
+            base_url=self.base_url,
+            timeout=int(self.timeout * 1000) if self.timeout is not None else None,
+            client_args={"limits": limits},
+            async_client_args={"limits": limits},
+        )
+
+
+_shared_clients: dict[tuple[str, GeminiConnectionOptions], genai.Client] = {}
+_shared_clients_lock = threading.Lock()
+
+
+def shared_client(
+    api_key: str, options: t.Optional[GeminiConnectionOptions] = None
+) -> genai.Client:
+    """
+    Return the process-wide genai client for this api key and connection options,
+    creating it on first use. genai clients are safe to use from many threads,
+    so sharing one reuses its pooled connections across Gemini instances.
+    """
+    from google import genai
+
+    options = options or GeminiConnectionOptions()
+    key = (api_key, options)
+    with _shared_clients_lock:
+        client = _shared_clients.get(key)
+        if client is None:
+            client = genai.Client(api_key=api_key, http_options=options.http_options())
+            _shared_clients[key] = client
+        return client
+
+
+def clear_shared_clients() -> None:
+    """
+    Forget all shared clients. Gemini instances already holding one keep using it.
+    """
+    with _shared_clients_lock:
+        _shared_clients.clear()
+
+
 class GeminiModelType(Enum):
     G2_5_pro = "gemini-2.5-pro"
     G2_5_flash = "gemini-2.5-flash"
@@ -43,14 +110,34 @@ class GeminiModelType(Enum):
 
 
 class GeminiChat(AIChat):
-    def __init__(self, chat_id: str, context: GenaiChat, config: GenerateContentConfig):
+    """
+    Gemini chat context. Without a history, the SDK chat keeps the full conversation.
+    With one, each turn re-sends only the bounded window: a fresh SDK chat is
+    seeded from the window, with any running summary added to the system instruction.
+    Turns on one chat are serialized so concurrent callers cannot interleave them.
+    """
+
+    def __init__(
+        self,
+        chat_id: str,
+        context: GenaiChat,
+        config: GenerateContentConfig,
+        history: t.Optional[ChatHistory] = None,
+        client: t.Optional[genai.Client] = None,
+        model: t.Optional[GeminiModelType] = None,
+    ):
         from google.genai.chats import Chat as GenaiChat
 
         if not isinstance(context, GenaiChat):
             raise TypeError("context must be an instance of google.genai.chats.Chat")
-        super().__init__(chat_id)
+        if history is not None and (client is None or model is None):
+            raise ValueError("client and model are required to manage chat history")
+        super().__init__(chat_id, history)
         self.context = context
         self.config = config
+        self.client = client
+        self.model = model
+        self._lock = threading.Lock()
 
     @property
     def chat_id(self) -> str:
@@ -71,11 +158,53 @@ class GeminiChat(AIChat):
             raise ex.ClientError("Chat context is not initialized")
         if config is None:
             config = self.config
+        with self._lock:
+            if self.history is None:
+                response = self.context.send_message(prompt, config=config)
+                return response.text
+            return self._ask_windowed(prompt, config)
+
+    def pin(self, text: str, role: str = "user") -> ChatMessage:
+        with self._lock:
+            return super().pin(text, role)
+
+    def _ask_windowed(self, prompt: str, config: GenerateContentConfig) -> str:
+        from google.genai.types import Content, Part
+
+        try:
+            self.history.compact(prompt)
+        except Exception as e:
+            # the summary is a nicety; keep the window bounded and send the turn anyway
+            logger.warning(
+                f"Summarizing chat {self.chat_id} failed, "
+                f"dropping turns without a summary: {e}"
+            )
+            self.history.compact(prompt, summarize=False)
+        if self.history.summary:
+            summary = f"Summary of the earlier conversation:\n{self.history.summary}"
+            instruction = "\n\n".join(
+                part for part in (config.system_instruction, summary) if part
+            )
+            config = config.model_copy(update={"system_instruction": instruction})
+        contents = [
+            Content(role=m.role, parts=[Part(text=m.text)])
+            for m in self.history.window()
+        ]
+        self.context = self.client.chats.create(
+            model=self.model.value, config=config, history=contents
+        )
         response = self.context.send_message(prompt, config=config)
+        self.history.add("user", prompt)
+        self.history.add("model", response.text or "")
         return response.text
 
 
 class Gemini(AiProviderClient):
+    """
+    Gemini provider. Safe for concurrent use from many threads; by default
+    instances with the same api key and connection options share one pooled client.
+    """
+
     def __init__(
         self,
         default_model: str | GeminiModelType,
@@ -84,7 +213,10 @@ class Gemini(AiProviderClient):
         default_sys_instructions: t.Optional[str] = None,
         default_temperature: float = 0.2,
         default_limit_tokens: t.Optional[int] = None,
+        connection_options: t.Optional[GeminiConnectionOptions] = None,
+        share_client: bool = True,
     ):
+        self._chats_lock = threading.Lock()
         self.chats = {}
         if backup_models is None:
             backup_models = []
@@ -103,25 +235,49 @@ class Gemini(AiProviderClient):
         self.default_sys_instructions = default_sys_instructions or ""
         self.default_limit_tokens = default_limit_tokens
         self.default_temperature = default_temperature
-        self.client = genai.Client(api_key=api_key)
+        self.connection_options = connection_options or GeminiConnectionOptions()
+        if share_client:
+            self.client = shared_client(api_key, self.connection_options)
+        else:
+            self.client = genai.Client(
+                api_key=api_key, http_options=self.connection_options.http_options()
+            )
 
     @property
     def chats(self) -> dict[str, AIChat]:
-        return self._chats
+        """
+        Snapshot of the registered chats. Safe to read while other threads create chats.
+        """
+        with self._chats_lock:
+            return dict(self._chats)
 
     @chats.setter
     def chats(self, value: dict[str, AIChat]):
         if not isinstance(value, dict):
             raise TypeError("chats must be a dictionary of AIChat instances")
-        self._chats = value
+        with self._chats_lock:
+            self._chats = dict(value)
+
+    def get_chat(self, chat_id: str) -> t.Optional[AIChat]:
+        with self._chats_lock:
+            return self._chats.get(chat_id)
 
     def get_config(
         self,
         temperature: t.Optional[float] = None,
         system_instructions: t.Optional[str] = None,
         limit_tokens: t.Optional[int] = None,
+        response_schema: t.Optional[dict[str, t.Any]] = None,
+        timeout_ms: t.Optional[int] = None,
     ) -> GenerateContentConfig:
-        from google.genai.types import GenerateContentConfig
+        from google.genai.types import GenerateContentConfig, HttpOptions
+
+        extra: dict[str, t.Any] = {}
+        if response_schema is not None:
+            extra["response_mime_type"] = "application/json"
+            extra["response_json_schema"] = response_schema
+        if timeout_ms is not None:
+            extra["http_options"] = HttpOptions(timeout=timeout_ms)
         return GenerateContentConfig(
             temperature=(
                 temperature if temperature is not None else self.default_temperature
@@ -130,6 +286,7 @@ class Gemini(AiProviderClient):
             max_output_tokens=(
                 limit_tokens if limit_tokens is not None else self.default_limit_tokens
             ),
+            **extra,
         )
 
     def ask(
@@ -140,6 +297,8 @@ class Gemini(AiProviderClient):
         system_instructions: t.Optional[str] = None,
         limit_tokens: t.Optional[int] = None,
         use_backups: bool = True,
+        response_schema: t.Optional[dict[str, t.Any]] = None,
+        deadline: t.Optional[Deadline] = None,
     ) -> str:
         logger.debug(f"Asking Gemini with prompt: {prompt}")
         if model is None:
@@ -152,15 +311,24 @@ class Gemini(AiProviderClient):
             models = [model]
         from google.genai.errors import ServerError
         for model in models:
+            timeout_ms = None
+            if deadline is not None:
+                deadline.check()
+                timeout_ms = deadline.timeout_ms(self.connection_options.timeout)
             try:
                 chat = self.create_chat(
                     model=model,
                     temperature=temperature,
                     system_instructions=system_instructions,
                     limit_tokens=limit_tokens,
+                    response_schema=response_schema,
+                    register=False,
+                    timeout_ms=timeout_ms,
                 )
                 return self.ask_chat(prompt, chat)
             except ServerError as e:
+                if deadline is not None:
+                    deadline.check()
                 if e.code == 503:  # Service Unavailable
                     logger.warning(f"Model {model} is unavailable, trying next model.")
                     continue
@@ -169,6 +337,8 @@ class Gemini(AiProviderClient):
                     f"Server error while asking with model {model}: {e}"
                 ) from e
             except Exception as e:
+                if deadline is not None:
+                    deadline.check()
                 logger.error(f"Unexpected error with model {model}: {e}")
                 raise ex.ProviderError(
                     f"Unexpected error while asking with model {model}: {e}"
@@ -178,7 +348,7 @@ class Gemini(AiProviderClient):
 
     def ask_chat(self, prompt: str, chat: GeminiChat | str) -> str:
         if isinstance(chat, str):
-            chat = self.chats.get(chat)
+            chat = self.get_chat(chat)
         if not isinstance(chat, GeminiChat):
             raise TypeError(
                 f"chat must be an instance of GeminiChat or a chat_id string but got {type(chat)}"
@@ -192,7 +362,19 @@ class Gemini(AiProviderClient):
         temperature: t.Optional[float] = None,
         system_instructions: t.Optional[str] = None,
         limit_tokens: t.Optional[int] = None,
+        response_schema: t.Optional[dict[str, t.Any]] = None,
+        register: bool = True,
+        history_policy: t.Optional[HistoryPolicy] = None,
+        summary_model: t.Optional[GeminiModelType | str] = None,
+        timeout_ms: t.Optional[int] = None,
     ) -> GeminiChat:
+        """
+        Create a chat. With a ``history_policy`` the re-sent history stays bounded;
+        if the policy summarizes, dropped turns are summarized by ``summary_model``
+        (default: the chat's model; pass a cheaper one to save cost) through this
+        client. If summarizing fails, the turns are dropped without a summary and
+        the chat turn still goes through.
+        """
         logger.debug("Creating a new Gemini chat")
         from google.genai.errors import APIError
 
@@ -201,6 +383,8 @@ class Gemini(AiProviderClient):
                 temperature=temperature,
                 system_instructions=system_instructions,
                 limit_tokens=limit_tokens,
+                response_schema=response_schema,
+                timeout_ms=timeout_ms,
             )
             if model is None:
                 model = self.default_model
@@ -208,10 +392,41 @@ class Gemini(AiProviderClient):
             if not sdk_chat:
                 raise ex.ProviderError("Failed to create chat with Gemini provider")
             chat_id = str(uuid.uuid4())
-            chat = GeminiChat(chat_id, sdk_chat, config=config)
-            self.chats[chat_id] = chat
+            history = None
+            if history_policy is not None:
+                history = ChatHistory(
+                    history_policy,
+                    summarizer=self._summarizer(summary_model or model),
+                )
+            chat = GeminiChat(
+                chat_id,
+                sdk_chat,
+                config=config,
+                history=history,
+                client=self.client,
+                model=model,
+            )
+            if register:
+                with self._chats_lock:
+                    self._chats[chat_id] = chat
             return chat
         except APIError as e:
             raise ex.ProviderError(f"API error while creating chat: {e}") from e
         except Exception as e:
             raise ex.ProviderError(f"Unexpected error while creating chat: {e}") from e
+
+    def _summarizer(
+        self, model: GeminiModelType | str
+    ) -> t.Callable[[str, list[ChatMessage]], str]:
+        def summarize(summary: str, dropped: list[ChatMessage]) -> str:
+            transcript = "\n".join(f"{m.role}: {m.text}" for m in dropped)
+            prompt = (
+                "Update the running summary of a conversation with the messages below. "
+                "Keep every fact, decision and open question needed to continue it. "
+                "Reply with the updated summary only.\n\n"
+                f"Current summary:\n{summary or '(none)'}\n\n"
+                f"Messages:\n{transcript}"
+            )
+            return self.ask(prompt, model=model)
+
+        return summarize
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import typing as t
+from logging import getLogger
+from ai_handler.providers.ai_provider_client import AiProviderClient
+import ai_handler.errors as ex
+from ai_handler.deadline import Deadline
+
+logger = getLogger("ai_handler")
+
+
+class OpenAI(AiProviderClient):
+    def __init__(
+        self,
+        default_model: str,
+        api_key: str,
+        backup_models: t.Optional[list[str]] = None,
+        default_sys_instructions: t.Optional[str] = None,
+        default_temperature: float = 0.2,
+        default_limit_tokens: t.Optional[int] = None,
+    ):
+        try:
+            import openai
+
+            self.openai = openai
+        except ImportError as e:
+            raise ImportError(
+                "The OpenAI provider requires the 'openai' package. "
+                "Install it with 'pip install ai_handler[openai]'"
+            ) from e
+        self.default_model = default_model
+        self.backup_models = list(backup_models or [])
+        self.api_key = api_key
+        self.default_sys_instructions = default_sys_instructions or ""
+        self.default_temperature = default_temperature
+        self.default_limit_tokens = default_limit_tokens
+        self.client = openai.OpenAI(api_key=api_key)
+
+    def get_request(
+        self,
+        prompt: str,
+        temperature: t.Optional[float] = None,
+        system_instructions: t.Optional[str] = None,
+        limit_tokens: t.Optional[int] = None,
+        response_schema: t.Optional[dict[str, t.Any]] = None,
+    ) -> dict[str, t.Any]:
+        messages = []
+        system = system_instructions or self.default_sys_instructions
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+        request: dict[str, t.Any] = {
+            "messages": messages,
+            "temperature": (
+                temperature if temperature is not None else self.default_temperature
+            ),
+        }
+        limit_tokens = (
+            limit_tokens if limit_tokens is not None else self.default_limit_tokens
+        )
+        if limit_tokens is not None:
+            request["max_completion_tokens"] = limit_tokens
+        if response_schema is not None:
+            request["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "answer", "schema": response_schema},
+            }
+        return request
+
+    def ask(
+        self,
+        prompt: str,
+        model: t.Optional[str] = None,
+        temperature: t.Optional[float] = None,
+        system_instructions: t.Optional[str] = None,
+        limit_tokens: t.Optional[int] = None,
+        use_backups: bool = True,
+        response_schema: t.Optional[dict[str, t.Any]] = None,
+        deadline: t.Optional[Deadline] = None,
+    ) -> str:
+        logger.debug(f"Asking OpenAI with prompt: {prompt}")
+        if model is None:
+            model = self.default_model
+        if use_backups and self.backup_models:
+            models = [model] + [m for m in self.backup_models if m != model]
+        else:
+            models = [model]
+        request = self.get_request(
+            prompt,
+            temperature=temperature,
+            system_instructions=system_instructions,
+            limit_tokens=limit_tokens,
+            response_schema=response_schema,
+        )
+        client = self.client
+        if deadline is not None:
+            # each SDK retry would get the full remaining time again
+            client = client.with_options(max_retries=0)
+        for model in models:
+            if deadline is not None:
+                deadline.check()
+                timeout = deadline.timeout()
+                if timeout is not None:
+                    request["timeout"] = timeout
+            try:
+                response = client.chat.completions.create(model=model, **request)
+                return response.choices[0].message.content or ""
+            except self.openai.APIStatusError as e:
+                if deadline is not None:
+                    deadline.check()
+                if e.status_code >= 500:
+                    logger.warning(f"Model {model} is unavailable, trying next model.")
+                    continue
+                logger.error(f"API error with model {model}: {e}")
+                raise ex.ProviderError(
+                    f"API error while asking with model {model}: {e}"
+                ) from e
+            except Exception as e:
+                if deadline is not None:
+                    deadline.check()
+                logger.error(f"Unexpected error with model {model}: {e}")
+                raise ex.ProviderError(
+                    f"Unexpected error while asking with model {model}: {e}"
+                ) from e
+        logger.error("All models are unavailable or failed to respond.")
+        raise ex.ProviderError("All models are unavailable or failed to respond.")
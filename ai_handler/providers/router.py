@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import threading
+import time
+import typing as t
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from logging import getLogger
+from ai_handler.providers.ai_provider_client import AiProviderClient
+import ai_handler.errors as ex
+
+logger = getLogger("ai_handler")
+
+
+@dataclass
+class RouteBackend:
+    """
+    A provider the router can send requests to.
+    ``kwargs`` are merged under the per-call kwargs, e.g. to pin a model.
+    """
+
+    name: str
+    client: AiProviderClient
+    cost_per_token: float = 0.0
+    kwargs: dict[str, t.Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class BackendStats:
+    """
+    Point-in-time view of a backend's live statistics.
+    ``latency`` is None until the backend has completed a request.
+    """
+
+    name: str
+    cost_per_token: float
+    latency: t.Optional[float]
+    error_rate: float
+    requests: int
+    errors: int
+    estimated_cost: float
+
+
+class RoutingPolicy(ABC):
+    """
+    Orders candidate backends from most to least preferred.
+    The router tries them in that order until one answers.
+    """
+
+    @abstractmethod
+    def rank(self, candidates: list[BackendStats]) -> list[BackendStats]: ...
+
+
+class Fastest(RoutingPolicy):
+    """
+    Prefer the lowest EWMA latency. Unmeasured backends go first so they get sampled.
+    """
+
+    def rank(self, candidates: list[BackendStats]) -> list[BackendStats]:
+        return sorted(candidates, key=lambda b: b.latency or 0.0)
+
+
+class Cheapest(RoutingPolicy):
+    """
+    Prefer the lowest cost per token, breaking ties on latency.
+    """
+
+    def rank(self, candidates: list[BackendStats]) -> list[BackendStats]:
+        return sorted(candidates, key=lambda b: (b.cost_per_token, b.latency or 0.0))
+
+
+class CheapestUnderLatency(RoutingPolicy):
+    """
+    Prefer the cheapest backend whose EWMA latency is within ``max_latency`` seconds.
+    Backends over the limit follow, fastest first.
+    """
+
+    def __init__(self, max_latency: float):
+        self.max_latency = max_latency
+
+    def rank(self, candidates: list[BackendStats]) -> list[BackendStats]:
+        within = [b for b in candidates if (b.latency or 0.0) <= self.max_latency]
+        over = [b for b in candidates if (b.latency or 0.0) > self.max_latency]
+        return Cheapest().rank(within) + Fastest().rank(over)
+
+
+class _BackendState:
+    def __init__(self, backend: RouteBackend):
+        self.backend = backend
+        self.latency: t.Optional[float] = None
+        self.error_rate = 0.0
+        self.error_rate_at: t.Optional[float] = None
+        self.last_attempt_at: t.Optional[float] = None
+        self.requests = 0
+        self.errors = 0
+        self.estimated_cost = 0.0
+
+
+class RoutingClient(AiProviderClient):
+    """
+    Provider client that routes each request to one of several backends.
+
+    Backends are ranked by a RoutingPolicy over live EWMA latency and error rate.
+    Backends whose error rate exceeds ``max_error_rate`` are only tried after the
+    healthy ones; their error rate decays with ``error_half_life`` seconds so
+    they get traffic again once the vendor recovers.
+    Latency is only measured on traffic, so a backend that has not been tried for
+    ``probe_interval`` seconds is sent the next request as a probe, letting its
+    latency average catch up after a slowdown. ``None`` disables probing.
+    A ProviderError from one backend fails over to the next.
+    """
+
+    def __init__(
+        self,
+        backends: list[RouteBackend],
+        policy: t.Optional[RoutingPolicy] = None,
+        alpha: float = 0.2,
+        max_error_rate: float = 0.5,
+        error_half_life: float = 30.0,
+        probe_interval: t.Optional[float] = 60.0,
+        chars_per_token: float = 4.0,
+        clock: t.Callable[[], float] = time.monotonic,
+    ):
+        if not backends:
+            raise ValueError("RoutingClient requires at least one backend")
+        names = [b.name for b in backends]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Backend names must be unique, got {names}")
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        self.policy = policy or Fastest()
+        self.alpha = alpha
+        self.max_error_rate = max_error_rate
+        self.error_half_life = error_half_life
+        self.probe_interval = probe_interval
+        self.chars_per_token = chars_per_token
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._states = {b.name: _BackendState(b) for b in backends}
+
+    @property
+    def stats(self) -> dict[str, BackendStats]:
+        now = self.clock()
+        with self._lock:
+            return {name: self._snapshot(s, now) for name, s in self._states.items()}
+
+    def ask(self, prompt: str, **kwargs) -> str:
+        last_error: t.Optional[Exception] = None
+        deadline = kwargs.get("deadline")
+        for candidate in self._ranked():
+            if deadline is not None:
+                deadline.check()
+            state = self._states[candidate.name]
+            backend = state.backend
+            start = self.clock()
+            with self._lock:
+                state.last_attempt_at = start
+            try:
+                response = backend.client.ask(prompt, **{**backend.kwargs, **kwargs})
+            except (ex.DeadlineExceededError, ex.RequestCancelledError):
+                # the caller's budget ran out; that says nothing about the backend
+                raise
+            except ex.ProviderError as e:
+                self._record(state, self.clock() - start, error=True)
+                logger.warning(f"Backend {backend.name} failed, trying next backend: {e}")
+                last_error = e
+                continue
+            except Exception:
+                self._record(state, self.clock() - start, error=True)
+                raise
+            tokens = (len(prompt) + len(response)) / self.chars_per_token
+            self._record(state, self.clock() - start, error=False, tokens=tokens)
+            return response
+        logger.error("All routing backends failed to respond.")
+        raise ex.ProviderError("All routing backends failed to respond.") from last_error
+
+    def _ranked(self) -> list[BackendStats]:
+        candidates = list(self.stats.values())
+        healthy = [b for b in candidates if b.error_rate <= self.max_error_rate]
+        degraded = [b for b in candidates if b.error_rate > self.max_error_rate]
+        ranked = self.policy.rank(healthy) + self.policy.rank(degraded)
+        probe = self._claim_probe()
+        if probe is not None:
+            ranked = [b for b in ranked if b.name == probe] + [
+                b for b in ranked if b.name != probe
+            ]
+        return ranked
+
+    def _claim_probe(self) -> t.Optional[str]:
+        """
+        Pick the backend left untried longest past ``probe_interval``, if any.
+        Marking it attempted here keeps concurrent requests from probing it too.
+        """
+        if self.probe_interval is None:
+            return None
+        now = self.clock()
+        with self._lock:
+            idle = [
+                s
+                for s in self._states.values()
+                if s.last_attempt_at is not None
+                and now - s.last_attempt_at >= self.probe_interval
+            ]
+            if not idle:
+                return None
+            state = min(idle, key=lambda s: s.last_attempt_at)
+            state.last_attempt_at = now
+            return state.backend.name
+
+    def _snapshot(self, state: _BackendState, now: float) -> BackendStats:
+        return BackendStats(
+            name=state.backend.name,
+            cost_per_token=state.backend.cost_per_token,
+            latency=state.latency,
+            error_rate=self._decayed_error_rate(state, now),
+            requests=state.requests,
+            errors=state.errors,
+            estimated_cost=state.estimated_cost,
+        )
+
+    def _decayed_error_rate(self, state: _BackendState, now: float) -> float:
+        if state.error_rate_at is None or not self.error_half_life:
+            return state.error_rate
+        elapsed = max(0.0, now - state.error_rate_at)
+        return state.error_rate * 0.5 ** (elapsed / self.error_half_life)
+
+    def _record(
+        self, state: _BackendState, latency: float, error: bool, tokens: float = 0.0
+    ) -> None:
+        now = self.clock()
+        with self._lock:
+            state.requests += 1
+            error_rate = self._decayed_error_rate(state, now)
+            state.error_rate = error_rate + self.alpha * (float(error) - error_rate)
+            state.error_rate_at = now
+            if error:
+                state.errors += 1
+                return
+            if state.latency is None:
+                state.latency = latency
+            else:
+                state.latency += self.alpha * (latency - state.latency)
+            state.estimated_cost += tokens * state.backend.cost_per_token
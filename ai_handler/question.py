@@ -1,8 +1,10 @@
 from __future__ import annotations
 from abc import ABC
 import typing as t
+import json
 import traceback
 import ai_handler.errors as ex
+from ai_handler.schema import JsonSchema, compile_schema
 
 
 class Question(ABC):
@@ -89,6 +91,15 @@ class Question(ABC):
         """
         return None
 
+    @property
+    def response_schema(self) -> t.Optional[JsonSchema]:
+        """
+        Override this property to request structured JSON output matching a schema.
+        Providers that support a native JSON mode receive the schema with the request.
+        Default implementation returns None, meaning free text.
+        """
+        return None
+
     def __hash__(self) -> int:
         return hash(self.prompt)
 
@@ -116,6 +127,34 @@ class SimpleQuestion(Question):
         return (KeyError, ValueError, AttributeError, AssertionError, TypeError)
 
 
+class JsonQuestion(SimpleQuestion):
+    """
+    Question whose answer must be JSON matching a schema.
+    The schema is compiled once, passed to the provider's JSON mode and
+    described in the prompt for providers without one.
+    """
+
+    def __init__(
+        self,
+        question: str,
+        schema: JsonSchema | dict[str, t.Any],
+        context: str = "",
+    ):
+        self.schema = compile_schema(schema)
+        super().__init__(
+            question,
+            context=context,
+            response_format=(
+                "Respond only with JSON matching this schema:\n"
+                f"{json.dumps(self.schema.schema)}"
+            ),
+        )
+
+    @property
+    def response_schema(self) -> JsonSchema:
+        return self.schema
+
+
 def simple_retry(
     question: Question,
 ) -> t.Callable[[Exception, int], t.Optional[Question]]:
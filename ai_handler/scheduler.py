@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+import typing as t
+from dataclasses import dataclass, field
+from enum import IntEnum
+from logging import getLogger
+
+import ai_handler.errors as ex
+from ai_handler.deadline import Deadline
+
+logger = getLogger("ai_handler")
+
+R = t.TypeVar("R")
+
+DEFAULT_TENANT = "default"
+
+
+class Priority(IntEnum):
+    """
+    Priority classes; lower values are served first.
+    """
+
+    INTERACTIVE = 0
+    DEFAULT = 1
+    BULK = 2
+
+
+@dataclass(frozen=True)
+class SchedulerMetrics:
+    in_flight: int
+    queue_depth: int
+    queue_depth_by_priority: dict[int, int]
+    admitted: int
+    shed: int
+    completed: int
+    wait_time_ewma: float
+    wait_time_max: float
+    service_time_ewma: t.Optional[float]
+
+
+@dataclass(order=True)
+class _Ticket:
+    priority: int
+    finish: float
+    seq: int
+    start: float = field(compare=False)
+    tenant: str = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    granted: bool = field(default=False, compare=False)
+    abandoned: bool = field(default=False, compare=False)
+
+
+class Scheduler:
+    """
+    Admission control in front of an AiProviderClient.
+
+    At most ``max_in_flight`` provider calls run at once. Waiting calls are served
+    by priority class, and within a class by weighted fair queuing across tenants
+    (``tenant_weights``, default weight 1), so a bulk tenant cannot starve others.
+    Calls are shed with SchedulerOverloadedError when the queue is full or the
+    estimated or actual queue wait exceeds ``max_queue_wait`` seconds.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 8,
+        tenant_weights: t.Optional[dict[str, float]] = None,
+        max_queue_wait: t.Optional[float] = None,
+        max_queue_depth: t.Optional[int] = None,
+        alpha: float = 0.2,
+        clock: t.Callable[[], float] = time.monotonic,
+    ):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.max_in_flight = max_in_flight
+        self.tenant_weights = dict(tenant_weights or {})
+        self.max_queue_wait = max_queue_wait
+        self.max_queue_depth = max_queue_depth
+        self.alpha = alpha
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._queue: list[_Ticket] = []
+        self._queued_by_priority: dict[int, int] = {}
+        self._seq = itertools.count()
+        self._virtual_time = 0.0
+        self._tenant_finish: dict[str, float] = {}
+        self._queued_by_tenant: dict[str, int] = {}
+        self._in_flight = 0
+        self._admitted = 0
+        self._shed = 0
+        self._completed = 0
+        self._wait_ewma = 0.0
+        self._wait_max = 0.0
+        self._service_ewma: t.Optional[float] = None
+
+    @property
+    def metrics(self) -> SchedulerMetrics:
+        with self._cond:
+            return SchedulerMetrics(
+                in_flight=self._in_flight,
+                queue_depth=sum(self._queued_by_priority.values()),
+                queue_depth_by_priority={
+                    p: n for p, n in self._queued_by_priority.items() if n
+                },
+                admitted=self._admitted,
+                shed=self._shed,
+                completed=self._completed,
+                wait_time_ewma=self._wait_ewma,
+                wait_time_max=self._wait_max,
+                service_time_ewma=self._service_ewma,
+            )
+
+    def run(
+        self,
+        fn: t.Callable[[], R],
+        priority: int = Priority.DEFAULT,
+        tenant: t.Optional[str] = None,
+        deadline: t.Optional[Deadline] = None,
+    ) -> R:
+        """
+        Run ``fn`` once a slot is granted to this caller.
+        """
+        self._acquire(int(priority), tenant or DEFAULT_TENANT, deadline)
+        start = self.clock()
+        try:
+            return fn()
+        finally:
+            self._release(self.clock() - start)
+
+    def _acquire(
+        self, priority: int, tenant: str, deadline: t.Optional[Deadline]
+    ) -> None:
+        with self._cond:
+            now = self.clock()
+            if self._in_flight < self.max_in_flight and not self._queue:
+                self._in_flight += 1
+                self._record_wait(0.0)
+                return
+            self._check_admission(priority)
+            ticket = self._enqueue(priority, tenant, now)
+            try:
+                while not ticket.granted:
+                    if deadline is not None:
+                        deadline.check()
+                    waited = self.clock() - ticket.enqueued_at
+                    timeout = None
+                    if self.max_queue_wait is not None:
+                        if waited >= self.max_queue_wait:
+                            self._shed += 1
+                            raise ex.SchedulerOverloadedError(
+                                f"Queue wait exceeded {self.max_queue_wait}s"
+                            )
+                        timeout = self.max_queue_wait - waited
+                    if deadline is not None:
+                        # poll so expiry and cancellation from another thread are noticed
+                        timeout = 0.05 if timeout is None else min(timeout, 0.05)
+                    self._cond.wait(timeout)
+            except BaseException:
+                if ticket.granted:
+                    self._in_flight -= 1
+                    self._dispatch()
+                else:
+                    self._abandon(ticket)
+                raise
+
+    def _check_admission(self, priority: int) -> None:
+        queued = sum(self._queued_by_priority.values())
+        if self.max_queue_depth is not None and queued >= self.max_queue_depth:
+            self._shed += 1
+            raise ex.SchedulerOverloadedError(
+                f"Scheduler queue is full ({queued} waiting)"
+            )
+        if self.max_queue_wait is None or self._service_ewma is None:
+            return
+        ahead = sum(n for p, n in self._queued_by_priority.items() if p <= priority)
+        estimate = (ahead + 1) / self.max_in_flight * self._service_ewma
+        if estimate > self.max_queue_wait:
+            self._shed += 1
+            raise ex.SchedulerOverloadedError(
+                f"Estimated queue wait {estimate:.3f}s exceeds {self.max_queue_wait}s"
+            )
+
+    def _enqueue(self, priority: int, tenant: str, now: float) -> _Ticket:
+        weight = self.tenant_weights.get(tenant, 1.0)
+        start = max(self._virtual_time, self._tenant_finish.get(tenant, 0.0))
+        finish = start + 1.0 / weight
+        self._tenant_finish[tenant] = finish
+        ticket = _Ticket(priority, finish, next(self._seq), start, tenant, now)
+        heapq.heappush(self._queue, ticket)
+        self._queued_by_priority[priority] = self._queued_by_priority.get(priority, 0) + 1
+        self._queued_by_tenant[tenant] = self._queued_by_tenant.get(tenant, 0) + 1
+        return ticket
+
+    def _abandon(self, ticket: _Ticket) -> None:
+        ticket.abandoned = True
+        self._queued_by_priority[ticket.priority] -= 1
+        self._queued_by_tenant[ticket.tenant] -= 1
+        # shed and cancelled calls were never served, so they do not count
+        # against the tenant's share
+        self._tenant_finish[ticket.tenant] -= ticket.finish - ticket.start
+        self._forget_idle_tenants()
+
+    def _dispatch(self) -> None:
+        while self._queue and self._in_flight < self.max_in_flight:
+            ticket = heapq.heappop(self._queue)
+            if ticket.abandoned:
+                continue
+            self._queued_by_priority[ticket.priority] -= 1
+            self._queued_by_tenant[ticket.tenant] -= 1
+            self._virtual_time = max(self._virtual_time, ticket.start)
+            ticket.granted = True
+            self._in_flight += 1
+            self._record_wait(self.clock() - ticket.enqueued_at)
+            self._forget_idle_tenants()
+        self._cond.notify_all()
+
+    def _forget_idle_tenants(self) -> None:
+        """
+        Drop tenants with nothing queued whose finish tag virtual time has passed;
+        a new ticket would start at virtual time for them anyway.
+        """
+        for tenant, finish in list(self._tenant_finish.items()):
+            if not self._queued_by_tenant.get(tenant) and finish <= self._virtual_time:
+                del self._tenant_finish[tenant]
+                self._queued_by_tenant.pop(tenant, None)
+
+    def _record_wait(self, waited: float) -> None:
+        self._admitted += 1
+        self._wait_ewma += self.alpha * (waited - self._wait_ewma)
+        self._wait_max = max(self._wait_max, waited)
+
+    def _release(self, service_time: float) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._completed += 1
+            if self._service_ewma is None:
+                self._service_ewma = service_time
+            else:
+                self._service_ewma += self.alpha * (service_time - self._service_ewma)
+            self._dispatch()
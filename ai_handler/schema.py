@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import json
+import re
+import typing as t
+
+import ai_handler.errors as ex
+
+Validator = t.Callable[[t.Any, str], None]
+
+_JSON_TYPES: dict[str, tuple[type, ...]] = {
+    "object": (dict,),
+    "array": (list,),
+    "string": (str,),
+    "integer": (int, float),
+    "number": (int, float),
+    "boolean": (bool,),
+    "null": (type(None),),
+}
+
+_FENCE_RE = re.compile(r"```(?:json|JSON)?\s*\n?(.*?)```", re.DOTALL)
+_decoder = json.JSONDecoder()
+
+
+class JsonSchema:
+    """
+    A JSON schema compiled once into a validator.
+
+    Supports the subset of JSON Schema that model structured-output modes understand:
+    type, properties, required, additionalProperties, items, enum,
+    minItems/maxItems, minLength/maxLength and minimum/maximum.
+    Compilation builds a tree of closures so validating an answer does no
+    schema interpretation at all.
+    """
+
+    def __init__(self, schema: dict[str, t.Any]):
+        if not isinstance(schema, dict):
+            raise TypeError("schema must be a dictionary")
+        self.schema = schema
+        self._validator = _compile(schema)
+
+    def validate(self, value: t.Any) -> t.Any:
+        """
+        Validate a decoded JSON value against the schema and return it.
+        Raises SchemaValidationError on mismatch.
+        """
+        self._validator(value, "$")
+        return value
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, JsonSchema):
+            return NotImplemented
+        return self.schema == other.schema
+
+    def __hash__(self) -> int:
+        return hash(json.dumps(self.schema, sort_keys=True))
+
+    def __repr__(self) -> str:
+        return f"JsonSchema({self.schema!r})"
+
+
+def compile_schema(schema: JsonSchema | dict[str, t.Any]) -> JsonSchema:
+    """
+    Return a compiled JsonSchema, reusing it if it is already compiled.
+    """
+    if isinstance(schema, JsonSchema):
+        return schema
+    return JsonSchema(schema)
+
+
+def extract_json(text: str, schema: t.Optional[JsonSchema] = None) -> t.Any:
+    """
+    Tolerantly extract a JSON value from model output.
+    Tries, in order: the whole text, fenced code blocks and every decodable
+    object or array embedded in surrounding prose. With a ``schema``, the first
+    candidate that validates is returned, so e.g. a citation like ``[1]`` before
+    the answer is skipped.
+    Raises json.JSONDecodeError if nothing can be decoded, or the first
+    candidate's SchemaValidationError if nothing validates (both ValueErrors).
+    """
+    first_error: t.Optional[ValueError] = None
+    for value in _candidates(text.strip()):
+        if schema is None:
+            return value
+        try:
+            return schema.validate(value)
+        except ex.SchemaValidationError as e:
+            first_error = first_error or e
+    if first_error is not None:
+        raise first_error
+    return json.loads(text.strip())
+
+
+def _candidates(text: str) -> t.Iterator[t.Any]:
+    try:
+        yield json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    for match in _FENCE_RE.finditer(text):
+        try:
+            yield json.loads(match.group(1).strip())
+        except json.JSONDecodeError:
+            continue
+    for index, char in enumerate(text):
+        if char not in "{[":
+            continue
+        try:
+            value, _ = _decoder.raw_decode(text, index)
+        except json.JSONDecodeError:
+            continue
+        yield value
+
+
+def _compile(schema: dict[str, t.Any]) -> Validator:
+    checks: list[Validator] = []
+
+    if "type" in schema:
+        checks.append(_type_check(schema["type"]))
+    if "enum" in schema:
+        checks.append(_enum_check(schema["enum"]))
+    if "properties" in schema or "required" in schema or "additionalProperties" in schema:
+        checks.append(_object_check(schema))
+    if "items" in schema or "minItems" in schema or "maxItems" in schema:
+        checks.append(_array_check(schema))
+    if "minLength" in schema or "maxLength" in schema:
+        checks.append(_length_check(schema.get("minLength"), schema.get("maxLength")))
+    if "minimum" in schema or "maximum" in schema:
+        checks.append(_range_check(schema.get("minimum"), schema.get("maximum")))
+
+    if not checks:
+        return lambda value, path: None
+    if len(checks) == 1:
+        return checks[0]
+
+    def validate(value: t.Any, path: str) -> None:
+        for check in checks:
+            check(value, path)
+
+    return validate
+
+
+def _type_check(type_: str | list[str]) -> Validator:
+    names = [type_] if isinstance(type_, str) else list(type_)
+    unknown = [name for name in names if name not in _JSON_TYPES]
+    if unknown:
+        raise ValueError(f"Unsupported schema type(s): {unknown}")
+    types = tuple(tp for name in names for tp in _JSON_TYPES[name])
+    allow_bool = "boolean" in names
+    # JSON Schema counts 1.0 as an integer
+    integral_floats_only = "integer" in names and "number" not in names
+
+    def validate(value: t.Any, path: str) -> None:
+        if isinstance(value, bool) and not allow_bool:
+            raise ex.SchemaValidationError(path, f"expected {type_}, got boolean")
+        if isinstance(value, float) and integral_floats_only:
+            if not value.is_integer():
+                raise ex.SchemaValidationError(path, f"expected {type_}, got {value}")
+            return
+        if not isinstance(value, types):
+            raise ex.SchemaValidationError(
+                path, f"expected {type_}, got {type(value).__name__}"
+            )
+
+    return validate
+
+
+def _enum_check(options: list[t.Any]) -> Validator:
+    def validate(value: t.Any, path: str) -> None:
+        if value not in options:
+            raise ex.SchemaValidationError(path, f"{value!r} is not one of {options!r}")
+
+    return validate
+
+
+def _object_check(schema: dict[str, t.Any]) -> Validator:
+    properties = {
+        name: _compile(sub) for name, sub in schema.get("properties", {}).items()
+    }
+    required = tuple(schema.get("required", ()))
+    additional = schema.get("additionalProperties", True)
+    additional_check = _compile(additional) if isinstance(additional, dict) else None
+
+    def validate(value: t.Any, path: str) -> None:
+        if not isinstance(value, dict):
+            return
+        for name in required:
+            if name not in value:
+                raise ex.SchemaValidationError(path, f"missing required property {name!r}")
+        for name, item in value.items():
+            check = properties.get(name)
+            if check is not None:
+                check(item, f"{path}.{name}")
+            elif additional_check is not None:
+                additional_check(item, f"{path}.{name}")
+            elif additional is False:
+                raise ex.SchemaValidationError(path, f"unexpected property {name!r}")
+
+    return validate
+
+
+def _array_check(schema: dict[str, t.Any]) -> Validator:
+    items = _compile(schema["items"]) if "items" in schema else None
+    min_items = schema.get("minItems")
+    max_items = schema.get("maxItems")
+
+    def validate(value: t.Any, path: str) -> None:
+        if not isinstance(value, list):
+            return
+        if min_items is not None and len(value) < min_items:
+            raise ex.SchemaValidationError(path, f"expected at least {min_items} items")
+        if max_items is not None and len(value) > max_items:
+            raise ex.SchemaValidationError(path, f"expected at most {max_items} items")
+        if items is not None:
+            for index, item in enumerate(value):
+                items(item, f"{path}[{index}]")
+
+    return validate
+
+
+def _length_check(min_length: t.Optional[int], max_length: t.Optional[int]) -> Validator:
+    def validate(value: t.Any, path: str) -> None:
+        if not isinstance(value, str):
+            return
+        if min_length is not None and len(value) < min_length:
+            raise ex.SchemaValidationError(path, f"shorter than {min_length} characters")
+        if max_length is not None and len(value) > max_length:
+            raise ex.SchemaValidationError(path, f"longer than {max_length} characters")
+
+    return validate
+
+
+def _range_check(
+    minimum: t.Optional[float], maximum: t.Optional[float]
+) -> Validator:
+    def validate(value: t.Any, path: str) -> None:
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return
+        if minimum is not None and value < minimum:
+            raise ex.SchemaValidationError(path, f"{value} is less than {minimum}")
+        if maximum is not None and value > maximum:
+            raise ex.SchemaValidationError(path, f"{value} is greater than {maximum}")
+
+    return validate
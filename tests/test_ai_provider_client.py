@@ -1,4 +1,9 @@
-from ai_handler.providers.ai_provider_client import AiProviderClient
+import pytest
+from ai_handler.providers.ai_provider_client import (
+    AiProviderClient,
+    ChatHistory,
+    HistoryPolicy,
+)
 
 
 class DummyProvider(AiProviderClient):
@@ -9,3 +14,72 @@ class DummyProvider(AiProviderClient):
 def test_ask_returns_expected_result():
     provider = DummyProvider()
     assert provider.ask("abc") == "cba"
+
+
+def make_history(**policy):
+    summaries = []
+
+    def summarizer(summary, dropped):
+        summaries.append([m.text for m in dropped])
+        return (summary + " " + " ".join(m.text for m in dropped)).strip()
+
+    return ChatHistory(HistoryPolicy(**policy), summarizer=summarizer), summaries
+
+
+def add_turns(history, count, start=0):
+    for i in range(start, start + count):
+        history.compact(f"q{i}")
+        history.add("user", f"q{i}")
+        history.add("model", f"a{i}")
+
+
+def test_history_window_by_turns_keeps_pinned_messages():
+    history, _ = make_history(max_turns=2)
+    history.pin("always remember this")
+    add_turns(history, 5)
+    assert [m.text for m in history.window()] == ["always remember this", "q3", "a3", "q4", "a4"]
+
+
+def test_history_window_by_tokens_stays_bounded():
+    history, _ = make_history(max_tokens=10, token_counter=len)
+    for i in range(50):
+        history.compact("xx")
+        assert history.tokens("xx") <= 10
+        history.add("user", "xx")
+        history.add("model", "yy")
+
+
+def test_history_summarizes_dropped_turns_in_batches():
+    history, summaries = make_history(max_turns=4, summarize=True)
+    add_turns(history, 5)
+    assert summaries == [["q0", "a0", "q1", "a1", "q2", "a2"]]
+    assert history.summary == "q0 a0 q1 a1 q2 a2"
+    assert [m.text for m in history.window()] == ["q3", "a3", "q4", "a4"]
+
+
+def test_history_keeps_turns_when_summarizer_fails():
+    def summarizer(summary, dropped):
+        raise RuntimeError("summary model down")
+
+    history = ChatHistory(HistoryPolicy(max_turns=2, summarize=True), summarizer)
+    history.pin("pinned")
+    for i in range(2):
+        history.add("user", f"q{i}")
+        history.add("model", f"a{i}")
+    with pytest.raises(RuntimeError):
+        history.compact("q2")
+    assert [m.text for m in history.window()] == ["pinned", "q0", "a0", "q1", "a1"]
+    assert history.summary == ""
+
+
+def test_history_compact_can_skip_the_summary():
+    history, summaries = make_history(max_turns=2, summarize=True)
+    add_turns(history, 2)
+    dropped = history.compact("q2", summarize=False)
+    assert [m.text for m in dropped] == ["q0", "a0"]
+    assert summaries == [] and history.summary == ""
+
+
+def test_history_summarize_requires_summarizer():
+    with pytest.raises(ValueError):
+        ChatHistory(HistoryPolicy(summarize=True))
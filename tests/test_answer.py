@@ -1,4 +1,6 @@
-from ai_handler.answer import SimpleAnswer
+import pytest
+from ai_handler.answer import JsonAnswer, SimpleAnswer
+from ai_handler.schema import JsonSchema
 
 def test_simple_answer_parse_and_raw():
     raw = " Hello! "
@@ -9,3 +11,20 @@ def test_simple_answer_parse_and_raw():
 def test_simple_answer_direct_init():
     answer = SimpleAnswer("hi")
     assert answer.raw == "hi"
+
+
+def test_json_answer_compiles_schema_once_and_validates():
+    class Point(JsonAnswer):
+        schema = {"type": "object", "required": ["x"]}
+
+    assert isinstance(Point.schema, JsonSchema)
+    answer = Point('The point is {"x": 1}.')
+    assert answer.data == {"x": 1}
+    with pytest.raises(ValueError):
+        Point('{"y": 1}')
+
+
+def test_json_answer_with_schema():
+    Numbers = JsonAnswer.with_schema({"type": "array", "items": {"type": "number"}})
+    assert Numbers("[1, 2.5]").data == [1, 2.5]
+    assert JsonAnswer('"plain"').data == "plain"
@@ -0,0 +1,122 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+anthropic = pytest.importorskip("anthropic")
+
+from ai_handler.providers.anthropic import Anthropic  # noqa: E402
+from ai_handler.deadline import Deadline  # noqa: E402
+from ai_handler.errors import DeadlineExceededError, ProviderError  # noqa: E402
+
+
+class FakeAnthropicHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.requests.append(body)
+        if body["model"] == "down":
+            return self.reply(529, {"type": "error", "error": {"message": "busy"}})
+        if body["model"] == "bad":
+            return self.reply(400, {"type": "error", "error": {"message": "bad"}})
+        prompt = body["messages"][-1]["content"]
+        if prompt.startswith("sleep"):
+            time.sleep(float(prompt.split()[1]))
+        self.reply(
+            200,
+            {
+                "id": "msg_1",
+                "type": "message",
+                "role": "assistant",
+                "model": body["model"],
+                "content": [{"type": "text", "text": prompt.upper()}],
+                "stop_reason": "end_turn",
+                "stop_sequence": None,
+                "usage": {"input_tokens": 1, "output_tokens": 1},
+            },
+        )
+
+    def reply(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def provider():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeAnthropicHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    FakeAnthropicHandler.requests = []
+    provider = Anthropic("claude-test", api_key="key", backup_models=["claude-backup"])
+    provider.client = anthropic.Anthropic(
+        api_key="key",
+        base_url=f"http://127.0.0.1:{server.server_address[1]}",
+        max_retries=0,
+    )
+    yield provider
+    server.shutdown()
+    server.server_close()
+
+
+def test_ask_returns_text_blocks(provider):
+    assert provider.ask("hello", system_instructions="be brief") == "HELLO"
+    request = FakeAnthropicHandler.requests[0]
+    assert request["model"] == "claude-test"
+    assert request["system"] == "be brief"
+    assert request["max_tokens"] == 4096
+    assert "temperature" not in request
+
+
+def test_response_schema_is_not_sent(provider):
+    provider.ask("who?", response_schema={"type": "object"})
+    assert set(FakeAnthropicHandler.requests[0]) == {"model", "messages", "max_tokens"}
+
+
+def test_fails_over_to_backup_model_on_5xx(provider):
+    assert provider.ask("hello", model="down") == "HELLO"
+    models = [r["model"] for r in FakeAnthropicHandler.requests]
+    assert models == ["down", "claude-backup"]
+
+
+def test_all_models_down_raises_provider_error(provider):
+    provider.backup_models = ["down"]
+    with pytest.raises(ProviderError):
+        provider.ask("hello", model="down")
+
+
+def test_client_errors_map_to_provider_error_without_failover(provider):
+    with pytest.raises(ProviderError):
+        provider.ask("hello", model="bad")
+    assert [r["model"] for r in FakeAnthropicHandler.requests] == ["bad"]
+
+
+def test_deadline_bounds_sdk_call(provider):
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceededError):
+        provider.ask("sleep 1", deadline=Deadline(0.3))
+    assert time.monotonic() - start < 0.9
+
+
+def test_deadline_turns_off_sdk_retries(provider):
+    provider.client = provider.client.with_options(max_retries=2)
+    provider.backup_models = []
+    with pytest.raises(ProviderError):
+        provider.ask("hello", model="down", deadline=Deadline(10))
+    assert [r["model"] for r in FakeAnthropicHandler.requests] == ["down"]
+
+
+def test_deadline_without_limit_keeps_client_timeout(provider):
+    provider.client = provider.client.with_options(timeout=0.2)
+    with pytest.raises(ProviderError):
+        provider.ask("sleep 1", use_backups=False, deadline=Deadline())
+    assert provider.ask("hello", deadline=Deadline()) == "HELLO"
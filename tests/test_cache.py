@@ -1,4 +1,6 @@
-from ai_handler.cache import InMemoryCache, NullCache
+from ai_handler.answer import SimpleAnswer
+from ai_handler.cache import AnswerCache, CacheEntry, InMemoryCache, NullCache
+from ai_handler.codec import CompressionCodec
 from ai_handler.question import SimpleQuestion
 
 def test_in_memory_cache_set_and_get():
@@ -17,3 +19,93 @@ def test_null_cache_always_misses():
     q = SimpleQuestion("irrelevant?")
     cache.set(q, "should not store")
     assert cache.get(q) is None
+
+def test_in_memory_cache_with_codec_stores_compressed_values():
+    codec = CompressionCodec(threshold=32)
+    cache = InMemoryCache(codec=codec)
+    q = SimpleQuestion("long?")
+    answer = "repetitive answer text " * 20
+    cache.set(q, answer)
+    stored = cache._store[cache.question_key(q)]
+    assert isinstance(stored, bytes) and len(stored) < len(answer)
+    assert codec.stats.decoded == 0
+    assert cache.get(q) == answer
+    assert cache.get(SimpleQuestion("missing?")) is None
+    assert codec.stats.decoded == 1
+
+def test_in_memory_cache_entries_carry_stored_at():
+    cache = InMemoryCache()
+    q = SimpleQuestion("when?")
+    cache.set_entry(q, CacheEntry("now", stored_at=123.0))
+    assert cache.get_entry(q) == CacheEntry("now", 123.0)
+    assert cache.get(q) == "now"
+    cache.set(q, "plain")
+    assert cache.get_entry(q) == CacheEntry("plain")
+    assert NullCache().get_entry(q) is None
+
+
+def test_answer_cache_shares_immutable_answers_and_evicts_lru():
+    class Frozen(SimpleAnswer):
+        immutable = True
+
+    cache = AnswerCache(max_size=2)
+    a, b, c = Frozen("a"), Frozen("b"), Frozen("c")
+    cache.set(1, Frozen, a, 1)
+    cache.set(2, Frozen, b, 1)
+    assert cache.get(1, Frozen, 1) == (a, None)
+    cache.set(3, Frozen, c, 1, stored_at=5.0)
+    assert cache.get(2, Frozen, 1) is None
+    assert cache.get(1, Frozen, 1)[0] is a
+    assert cache.get(3, Frozen, 1) == (c, 5.0)
+    assert cache.get(1, SimpleAnswer, 1) is None
+
+
+def test_answer_cache_skips_mutable_answers_unless_copy_on_read():
+    answer = SimpleAnswer("x")
+    plain = AnswerCache()
+    plain.set(1, SimpleAnswer, answer, 1)
+    assert plain.get(1, SimpleAnswer, 1) is None
+
+    copying = AnswerCache(copy_on_read=True)
+    copying.set(1, SimpleAnswer, answer, 1)
+    answer.raw = "mutated after caching"
+    first, _ = copying.get(1, SimpleAnswer, 1)
+    first.raw = "mutated by a reader"
+    second, _ = copying.get(1, SimpleAnswer, 1)
+    assert second.raw == "x"
+
+
+def test_answer_cache_invalidate_drops_every_factory():
+    cache = AnswerCache(copy_on_read=True)
+    other = lambda raw: SimpleAnswer(raw)  # noqa: E731
+    cache.set(1, SimpleAnswer, SimpleAnswer("x"), 1)
+    cache.set(1, other, SimpleAnswer("x"), 1)
+    cache.set(2, SimpleAnswer, SimpleAnswer("y"), 1)
+    cache.invalidate(1)
+    assert cache.get(1, SimpleAnswer, 1) is None and cache.get(1, other, 1) is None
+    assert len(cache) == 1
+
+
+def test_in_memory_cache_version_changes_on_every_write():
+    cache = InMemoryCache()
+    q = SimpleQuestion("v?")
+    assert cache.version(q) is None
+    cache.set(q, "one")
+    first = cache.version(q)
+    cache.set(q, "one")
+    assert cache.version(q) not in (None, first)
+
+
+def test_answer_cache_rejects_entries_of_another_version():
+    class Frozen(SimpleAnswer):
+        immutable = True
+
+    cache = AnswerCache()
+    answer = Frozen("a")
+    cache.set(1, Frozen, answer, 1)
+    assert cache.get(1, Frozen, 1) == (answer, None)
+    assert cache.get(1, Frozen, 2) is None
+    assert cache.get(1, Frozen, 1) is None
+    assert len(cache) == 0
+    cache.set(1, Frozen, answer, None)
+    assert len(cache) == 0
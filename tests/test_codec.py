@@ -0,0 +1,65 @@
+import json
+import pytest
+from ai_handler.codec import CompressionCodec, train_dictionary
+
+ANSWERS = [
+    json.dumps(
+        {
+            "summary": f"Daily summary number {i} for the account overview report.",
+            "status": "ok",
+            "items": [{"name": f"item-{j}", "quantity": j, "unit": "pieces"} for j in range(i % 7)],
+        }
+    )
+    for i in range(200)
+]
+
+
+def test_small_values_skip_compression():
+    codec = CompressionCodec(threshold=64)
+    data = codec.encode("short")
+    assert data == b"\x00short"
+    assert codec.decode(data) == "short"
+    assert codec.stats.compressed == 0
+
+
+@pytest.mark.parametrize("algorithm", ["zlib", "lzma"])
+def test_round_trip_and_ratio(algorithm):
+    codec = CompressionCodec(algorithm=algorithm, threshold=16)
+    value = "the same boilerplate sentence. " * 50
+    data = codec.encode(value)
+    assert len(data) < len(value)
+    assert codec.decode(data) == value
+    stats = codec.stats
+    assert stats.compressed == 1 and stats.decoded == 1
+    assert stats.ratio > 5
+    assert stats.encode_seconds >= 0 and stats.decode_seconds >= 0
+
+
+def test_incompressible_values_are_stored_raw():
+    codec = CompressionCodec(threshold=1)
+    value = "a7Qz"
+    assert codec.decode(codec.encode(value)) == value
+    assert codec.stats.compressed == 0
+
+
+def test_trained_dictionary_improves_ratio():
+    dictionary = train_dictionary(ANSWERS[:100], size=4096)
+    assert 0 < len(dictionary) <= 4096
+    plain = CompressionCodec(threshold=0)
+    trained = CompressionCodec(threshold=0, dictionary=dictionary)
+    for answer in ANSWERS[100:]:
+        assert trained.decode(trained.encode(answer)) == answer
+        plain.encode(answer)
+    assert trained.stats.ratio > 2 * plain.stats.ratio
+
+
+def test_dictionary_mismatch_is_detected():
+    a = CompressionCodec(threshold=0, dictionary=train_dictionary(ANSWERS[:50]))
+    b = CompressionCodec(threshold=0, dictionary=b"something else entirely")
+    with pytest.raises(ValueError):
+        b.decode(a.encode(ANSWERS[0]))
+
+
+def test_dictionary_requires_zlib():
+    with pytest.raises(ValueError):
+        CompressionCodec(algorithm="lzma", dictionary=b"x")
@@ -0,0 +1,46 @@
+import threading
+import pytest
+from ai_handler.deadline import Deadline
+from ai_handler.errors import DeadlineExceededError, RequestCancelledError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_unbounded_deadline():
+    deadline = Deadline()
+    assert deadline.remaining() is None
+    assert deadline.timeout(5) == 5
+    assert deadline.timeout_ms() is None
+    deadline.check()
+
+
+def test_remaining_time_shrinks_attempt_timeout():
+    clock = FakeClock()
+    deadline = Deadline(10, clock=clock)
+    assert deadline.timeout(30) == 10
+    clock.now += 8
+    assert deadline.timeout(30) == pytest.approx(2)
+    assert deadline.timeout(1) == 1
+    clock.now += 2
+    assert deadline.expired
+    assert deadline.timeout_ms() == 1
+    with pytest.raises(DeadlineExceededError):
+        deadline.check()
+
+
+def test_deadline_exceeded_is_a_timeout_error():
+    assert issubclass(DeadlineExceededError, TimeoutError)
+
+
+def test_cancel_from_another_thread_wakes_waiters():
+    deadline = Deadline(30)
+    threading.Timer(0.05, deadline.cancel).start()
+    assert deadline.wait() is True
+    with pytest.raises(RequestCancelledError):
+        deadline.check()
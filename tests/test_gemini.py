@@ -0,0 +1,168 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("google.genai")
+
+from ai_handler.deadline import Deadline  # noqa: E402
+from ai_handler.errors import DeadlineExceededError  # noqa: E402
+from ai_handler.providers.ai_provider_client import HistoryPolicy  # noqa: E402
+from ai_handler.providers.gemini import (  # noqa: E402
+    Gemini,
+    GeminiConnectionOptions,
+    clear_shared_clients,
+    shared_client,
+)
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    requests = []
+    paths = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.requests.append(body)
+        self.paths.append(self.path)
+        if "retired-model" in self.path:
+            return self.reply(404, {"error": {"code": 404, "message": "not found"}})
+        prompt = body["contents"][-1]["parts"][0]["text"]
+        if prompt.startswith("sleep"):
+            time.sleep(float(prompt.split()[1]))
+        self.reply(
+            200,
+            {
+                "candidates": [
+                    {
+                        "content": {"role": "model", "parts": [{"text": prompt.upper()}]},
+                        "finishReason": "STOP",
+                    }
+                ]
+            },
+        )
+
+    def reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGeminiHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    FakeGeminiHandler.requests = []
+    FakeGeminiHandler.paths = []
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    clear_shared_clients()
+
+
+def test_shared_client_is_reused_per_key(fake_server):
+    options = GeminiConnectionOptions(base_url=fake_server, max_connections=4)
+    a = Gemini("gemini-2.5-flash", api_key="key", connection_options=options)
+    b = Gemini("gemini-2.5-flash", api_key="key", connection_options=options)
+    c = Gemini("gemini-2.5-flash", api_key="other", connection_options=options)
+    d = Gemini(
+        "gemini-2.5-flash", api_key="key", connection_options=options, share_client=False
+    )
+    assert a.client is b.client is shared_client("key", options)
+    assert c.client is not a.client
+    assert d.client is not a.client
+
+
+def test_concurrent_asks_from_many_threads(fake_server):
+    options = GeminiConnectionOptions(base_url=fake_server, max_connections=8, timeout=10)
+    gemini = Gemini("gemini-2.5-flash", api_key="key", connection_options=options)
+    prompts = [f"prompt {i}" for i in range(64)]
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        answers = list(pool.map(gemini.ask, prompts))
+    assert answers == [p.upper() for p in prompts]
+    assert gemini.chats == {}
+
+
+def test_concurrent_chat_creation_registers_every_chat(fake_server):
+    options = GeminiConnectionOptions(base_url=fake_server)
+    gemini = Gemini("gemini-2.5-flash", api_key="key", connection_options=options)
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        chats = list(pool.map(lambda _: gemini.create_chat(), range(100)))
+    assert set(gemini.chats) == {chat.chat_id for chat in chats}
+    assert gemini.ask_chat("hello", chats[0].chat_id) == "HELLO"
+
+
+def test_chat_history_is_windowed_and_summarized(fake_server):
+    options = GeminiConnectionOptions(base_url=fake_server)
+    gemini = Gemini("gemini-2.5-flash", api_key="key", connection_options=options)
+    chat = gemini.create_chat(history_policy=HistoryPolicy(max_turns=4, summarize=True))
+    chat.pin("pinned fact")
+    for i in range(12):
+        assert chat.ask(f"turn {i}") == f"TURN {i}"
+
+    requests = FakeGeminiHandler.requests
+    turns = [r for r in requests if "Update the running summary" not in json.dumps(r)]
+    summaries = [
+        path
+        for r, path in zip(requests, FakeGeminiHandler.paths)
+        if "Update the running summary" in json.dumps(r)
+    ]
+    assert summaries
+    assert all("/models/gemini-2.5-flash:" in path for path in summaries)
+    # pinned message + at most 4 turns of history + the new prompt
+    assert max(len(r["contents"]) for r in turns) <= 1 + 2 * 4 + 1
+    assert all(r["contents"][0]["parts"][0]["text"] == "pinned fact" for r in turns)
+    assert "Summary of the earlier conversation" in json.dumps(turns[-1])
+    assert chat.history.summary
+
+
+def test_concurrent_asks_on_one_windowed_chat_keep_turns_paired(fake_server):
+    options = GeminiConnectionOptions(base_url=fake_server)
+    gemini = Gemini("gemini-2.5-flash", api_key="key", connection_options=options)
+    chat = gemini.create_chat(history_policy=HistoryPolicy(max_turns=100))
+    prompts = [f"sleep 0.01 turn {i}" for i in range(24)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        answers = list(pool.map(chat.ask, prompts))
+    assert answers == [p.upper() for p in prompts]
+    window = chat.history.window()
+    assert len(window) == 2 * len(prompts)
+    for question, answer in zip(window[::2], window[1::2]):
+        assert (question.role, answer.role) == ("user", "model")
+        assert answer.text == question.text.upper()
+
+
+def test_failed_summary_does_not_fail_the_turn(fake_server):
+    options = GeminiConnectionOptions(base_url=fake_server)
+    gemini = Gemini("gemini-2.5-flash", api_key="key", connection_options=options)
+    chat = gemini.create_chat(
+        history_policy=HistoryPolicy(max_turns=2, summarize=True),
+        summary_model="retired-model",
+    )
+    for i in range(6):
+        assert chat.ask(f"turn {i}") == f"TURN {i}"
+    assert chat.history.summary == ""
+    assert len(chat.history.window()) <= 2 * 2
+
+
+def test_deadline_bounds_sdk_call(fake_server):
+    options = GeminiConnectionOptions(base_url=fake_server, timeout=30)
+    gemini = Gemini(
+        "gemini-2.5-flash",
+        api_key="key",
+        backup_models=["gemini-2.5-pro"],
+        connection_options=options,
+    )
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceededError):
+        gemini.ask("sleep 2", deadline=Deadline(0.3))
+    assert time.monotonic() - start < 1.5
+    assert gemini.ask("fast", deadline=Deadline(5)) == "FAST"
@@ -1,10 +1,25 @@
+import threading
+
 import pytest
 from ai_handler.ai_handler import AiHandler
-from ai_handler.question import SimpleQuestion, Question
-from ai_handler.answer import SimpleAnswer, Answer
-from ai_handler.cache import InMemoryCache, NullCache
+from ai_handler.question import SimpleQuestion, Question, JsonQuestion
+from ai_handler.answer import SimpleAnswer, Answer, JsonAnswer
+from ai_handler.cache import (
+    AnswerCache,
+    CacheStats,
+    InMemoryCache,
+    NullCache,
+    RefreshPolicy,
+)
+from ai_handler.deadline import Deadline
 from ai_handler.providers.ai_provider_client import AiProviderClient
-from ai_handler.errors import InvalidModelResponseException
+from ai_handler.errors import (
+    DeadlineExceededError,
+    InvalidModelResponseException,
+    ProviderError,
+    RequestCancelledError,
+)
+from ai_handler.scheduler import Priority, Scheduler
 
 
 class DummyProvider(AiProviderClient):
@@ -21,6 +36,13 @@ class DummyProvider(AiProviderClient):
                 return prompt.upper()
 
 
+class StrictAnswer(Answer):
+    def __init__(self, raw: str):
+        if not raw:
+            raise ValueError("empty")
+        super().__init__(raw)
+
+
 def test_handler_ask_success(monkeypatch):
     handler = AiHandler(DummyProvider(), InMemoryCache())
     answer = handler.ask("hi there")
@@ -100,3 +122,300 @@ def test_handler_max_retries_exceeded(monkeypatch):
     handler = AiHandler(AlwaysBad(), NullCache())
     with pytest.raises(InvalidModelResponseException):
         handler.ask(q)
+
+
+def test_handler_passes_response_schema_to_provider():
+    class JsonProvider(AiProviderClient):
+        def __init__(self):
+            self.kwargs = []
+
+        def ask(self, prompt: str, **kwargs) -> str:
+            self.kwargs.append(kwargs)
+            return 'Sure, here it is: ```json\n{"name": "Ada"}\n```'
+
+    class Person(JsonAnswer):
+        schema = {"type": "object", "required": ["name"]}
+
+    provider = JsonProvider()
+    handler = AiHandler(provider, NullCache())
+    answer = handler.ask(
+        JsonQuestion("who?", Person.schema), answer_factory=Person
+    )
+    assert answer.data == {"name": "Ada"}
+    assert provider.kwargs == [{"response_schema": Person.schema.schema}]
+
+
+def test_handler_without_schema_passes_no_response_schema():
+    class RecordingProvider(AiProviderClient):
+        def ask(self, prompt: str, **kwargs) -> str:
+            assert "response_schema" not in kwargs
+            return "ok"
+
+    AiHandler(RecordingProvider(), NullCache()).ask("plain")
+
+
+class CountingProvider(AiProviderClient):
+    def __init__(self):
+        self.calls = 0
+        self.prompts = []
+        self.fail = False
+        self.empty_replies = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def ask(self, prompt: str, **kwargs) -> str:
+        self.release.wait(5)
+        self.calls += 1
+        self.prompts.append(prompt)
+        if self.fail:
+            raise ProviderError("provider down")
+        if self.empty_replies:
+            self.empty_replies -= 1
+            return ""
+        return f"answer {self.calls}"
+
+
+def make_refresh_handler(provider):
+    clock = [1000.0]
+    policy = RefreshPolicy(fresh_ttl=10, stale_ttl=100, clock=lambda: clock[0])
+    return AiHandler(provider, InMemoryCache(), refresh_policy=policy), clock
+
+
+def test_refresh_fresh_hit_does_not_call_provider():
+    provider = CountingProvider()
+    handler, clock = make_refresh_handler(provider)
+    assert handler.ask("q").raw == "answer 1"
+    clock[0] += 5
+    assert handler.ask("q").raw == "answer 1"
+    handler.close()
+    assert provider.calls == 1
+
+
+def test_refresh_stale_hit_returns_immediately_and_refreshes_once():
+    provider = CountingProvider()
+    handler, clock = make_refresh_handler(provider)
+    handler.ask("q")
+    clock[0] += 50
+    provider.release.clear()
+    answers = [handler.ask("q").raw for _ in range(5)]
+    assert answers == ["answer 1"] * 5
+    provider.release.set()
+    handler.close()
+    assert provider.calls == 2
+    assert handler.ask("q").raw == "answer 2"
+
+
+def test_refresh_error_keeps_serving_stale_value():
+    provider = CountingProvider()
+    handler, clock = make_refresh_handler(provider)
+    handler.ask("q")
+    clock[0] += 50
+    provider.fail = True
+    assert handler.ask("q").raw == "answer 1"
+    handler.close()
+    assert handler.ask("q").raw == "answer 1"
+
+
+def test_refresh_retry_does_not_rewrite_callers_question():
+    provider = CountingProvider()
+    handler, clock = make_refresh_handler(provider)
+    q = SimpleQuestion("q")
+    prompt = q.prompt
+    assert handler.ask(q, answer_factory=StrictAnswer).raw == "answer 1"
+    clock[0] += 50
+    provider.empty_replies = 1
+    assert handler.ask(q, answer_factory=StrictAnswer).raw == "answer 1"
+    handler.close()
+    assert provider.calls == 3
+    assert provider.prompts[2] != prompt
+    assert q.prompt == prompt
+    assert handler.ask(q, answer_factory=StrictAnswer).raw == "answer 3"
+
+
+def test_retried_question_is_stored_under_its_original_key():
+    provider = CountingProvider()
+    provider.empty_replies = 1
+    handler = AiHandler(provider, InMemoryCache())
+    q = SimpleQuestion("x")
+    prompt = q.prompt
+    assert handler.ask(q, answer_factory=StrictAnswer).raw == "answer 2"
+    assert q.prompt == prompt
+    assert handler.ask(SimpleQuestion("x"), answer_factory=StrictAnswer).raw == "answer 2"
+    assert handler.cache_stats == CacheStats(object_hits=0, raw_hits=1, misses=1)
+
+
+def test_refresh_expired_entry_is_a_blocking_miss():
+    provider = CountingProvider()
+    handler, clock = make_refresh_handler(provider)
+    handler.ask("q")
+    clock[0] += 500
+    assert handler.ask("q").raw == "answer 2"
+    handler.close()
+    assert provider.calls == 2
+
+
+def test_refresh_serves_entries_set_directly_without_ttl():
+    provider = CountingProvider()
+    handler, clock = make_refresh_handler(provider)
+    handler.cache.set(SimpleQuestion("q"), "seeded")
+    clock[0] += 500
+    assert handler.ask("q").raw == "seeded"
+    handler.close()
+    assert provider.calls == 0
+
+
+def test_refresh_policy_rejects_stale_ttl_shorter_than_fresh_ttl():
+    with pytest.raises(ValueError):
+        RefreshPolicy(fresh_ttl=10, stale_ttl=5)
+
+
+def test_handler_deadline_stops_retries():
+    clock = [0.0]
+
+    class SlowBadProvider(AiProviderClient):
+        def __init__(self):
+            self.timeouts = []
+
+        def ask(self, prompt: str, **kwargs) -> str:
+            self.timeouts.append(kwargs["deadline"].timeout(10))
+            clock[0] += 5
+            return ""
+
+    provider = SlowBadProvider()
+    handler = AiHandler(provider, NullCache())
+    deadline = Deadline(8, clock=lambda: clock[0])
+    with pytest.raises(DeadlineExceededError):
+        handler.ask(SimpleQuestion("q"), answer_factory=StrictAnswer, deadline=deadline)
+    assert provider.timeouts == [8, 3]
+
+
+def test_handler_cancellation_from_another_thread():
+    deadline = Deadline()
+
+    class CancellingProvider(AiProviderClient):
+        def ask(self, prompt: str, **kwargs) -> str:
+            worker = threading.Thread(target=deadline.cancel)
+            worker.start()
+            worker.join()
+            return ""
+
+    handler = AiHandler(CancellingProvider(), NullCache())
+    with pytest.raises(RequestCancelledError):
+        handler.ask("q", answer_factory=StrictAnswer, deadline=deadline)
+
+
+def test_handler_expired_deadline_skips_provider():
+    class NeverCalled(AiProviderClient):
+        def ask(self, prompt: str, **kwargs) -> str:
+            raise AssertionError("provider should not be called")
+
+    with pytest.raises(DeadlineExceededError):
+        AiHandler(NeverCalled(), NullCache()).ask("q", deadline=Deadline(0))
+
+
+def test_handler_routes_provider_calls_through_scheduler():
+    class RecordingScheduler(Scheduler):
+        def __init__(self):
+            super().__init__(max_in_flight=1)
+            self.calls = []
+
+        def run(self, fn, priority=Priority.DEFAULT, tenant=None, deadline=None):
+            self.calls.append((priority, tenant))
+            return super().run(fn, priority, tenant, deadline)
+
+    class KwargsProvider(AiProviderClient):
+        def ask(self, prompt: str, **kwargs) -> str:
+            assert "priority" not in kwargs and "tenant" not in kwargs
+            return "ok"
+
+    scheduler = RecordingScheduler()
+    handler = AiHandler(KwargsProvider(), NullCache(), scheduler=scheduler)
+    handler.ask("q", priority=Priority.INTERACTIVE, tenant="ui")
+    assert scheduler.calls == [(Priority.INTERACTIVE, "ui")]
+    assert scheduler.metrics.completed == 1
+
+
+class ParseCountingAnswer(Answer):
+    immutable = True
+    parses = 0
+
+    def __init__(self, raw: str):
+        type(self).parses += 1
+        super().__init__(raw)
+
+
+def test_handler_answer_cache_skips_reparsing_hot_keys():
+    ParseCountingAnswer.parses = 0
+    cache = InMemoryCache()
+    cache.set(SimpleQuestion("warm"), "CACHED")
+    handler = AiHandler(DummyProvider(), cache, answer_cache=AnswerCache())
+    answers = [handler.ask("warm", answer_factory=ParseCountingAnswer) for _ in range(5)]
+    assert ParseCountingAnswer.parses == 1
+    assert all(a is answers[0] for a in answers)
+    handler.ask("cold", answer_factory=ParseCountingAnswer)
+    handler.ask("cold", answer_factory=ParseCountingAnswer)
+    assert ParseCountingAnswer.parses == 2
+    assert handler.cache_stats == CacheStats(object_hits=5, raw_hits=1, misses=1)
+
+
+def test_handler_refresh_invalidates_parsed_answers():
+    provider = CountingProvider()
+    handler, clock = make_refresh_handler(provider)
+    handler.answer_cache = AnswerCache()
+    assert handler.ask("q", answer_factory=ParseCountingAnswer).raw == "answer 1"
+    clock[0] += 50
+    assert handler.ask("q", answer_factory=ParseCountingAnswer).raw == "answer 1"
+    handler.close()
+    assert handler.ask("q", answer_factory=ParseCountingAnswer).raw == "answer 2"
+    assert handler.cache_stats.object_hits == 1
+
+
+def test_handler_answer_cache_sees_direct_raw_cache_writes():
+    ParseCountingAnswer.parses = 0
+    cache = InMemoryCache()
+    handler = AiHandler(DummyProvider(), cache, answer_cache=AnswerCache())
+    first = handler.ask("q", answer_factory=ParseCountingAnswer)
+    assert handler.ask("q", answer_factory=ParseCountingAnswer) is first
+    cache.set(SimpleQuestion("q"), "REPLACED")
+    assert handler.ask("q", answer_factory=ParseCountingAnswer).raw == "REPLACED"
+    assert ParseCountingAnswer.parses == 2
+
+
+def test_handler_answer_cache_falls_back_to_raw_cache_without_versions():
+    provider = CountingProvider()
+    handler = AiHandler(provider, NullCache(), answer_cache=AnswerCache())
+    answers = [handler.ask("q", answer_factory=ParseCountingAnswer).raw for _ in range(3)]
+    assert answers == ["answer 1", "answer 2", "answer 3"]
+    assert handler.cache_stats.object_hits == 0
+
+
+def test_handler_raw_hit_racing_a_write_does_not_pin_the_old_answer():
+    class RacingCache(InMemoryCache):
+        def get(self, question):
+            raw = super().get(question)
+            if raw == "OLD":
+                # a refresh lands right after this raw hit read the old entry
+                self.set(question, "NEW")
+            return raw
+
+    cache = RacingCache()
+    cache.set(SimpleQuestion("q"), "OLD")
+    handler = AiHandler(DummyProvider(), cache, answer_cache=AnswerCache())
+    assert handler.ask("q", answer_factory=ParseCountingAnswer).raw == "OLD"
+    assert handler.ask("q", answer_factory=ParseCountingAnswer).raw == "NEW"
+
+
+def test_handler_defaults_to_schema_bound_json_answer():
+    class ProseProvider(AiProviderClient):
+        def ask(self, prompt: str, **kwargs) -> str:
+            return 'Sure: {"wrong": 1}' if "bad" in prompt else 'Per [1]: {"name": "Ada"}'
+
+    handler = AiHandler(ProseProvider(), NullCache())
+    schema = {"type": "object", "required": ["name"]}
+    answer = handler.ask(JsonQuestion("who?", schema))
+    assert isinstance(answer, JsonAnswer)
+    assert answer.data == {"name": "Ada"}
+    assert type(answer) is JsonAnswer.for_schema(schema)
+    assert JsonAnswer.for_schema(schema) is JsonAnswer.for_schema(dict(schema))
+    with pytest.raises(InvalidModelResponseException):
+        handler.ask(JsonQuestion("bad?", schema))
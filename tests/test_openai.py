@@ -0,0 +1,127 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+openai = pytest.importorskip("openai")
+
+from ai_handler.providers.openai import OpenAI  # noqa: E402
+from ai_handler.deadline import Deadline  # noqa: E402
+from ai_handler.errors import DeadlineExceededError, ProviderError  # noqa: E402
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.requests.append(body)
+        if body["model"] == "down":
+            return self.reply(503, {"error": {"message": "overloaded"}})
+        if body["model"] == "bad":
+            return self.reply(400, {"error": {"message": "bad request"}})
+        prompt = body["messages"][-1]["content"]
+        if prompt.startswith("sleep"):
+            time.sleep(float(prompt.split()[1]))
+        self.reply(
+            200,
+            {
+                "id": "chatcmpl-1",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": prompt.upper()},
+                    }
+                ],
+            },
+        )
+
+    def reply(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def provider():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAIHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    FakeOpenAIHandler.requests = []
+    provider = OpenAI("gpt-test", api_key="key", backup_models=["gpt-backup"])
+    provider.client = openai.OpenAI(
+        api_key="key",
+        base_url=f"http://127.0.0.1:{server.server_address[1]}/v1",
+        max_retries=0,
+    )
+    yield provider
+    server.shutdown()
+    server.server_close()
+
+
+def test_ask_returns_message_content(provider):
+    assert provider.ask("hello", system_instructions="be brief") == "HELLO"
+    request = FakeOpenAIHandler.requests[0]
+    assert request["model"] == "gpt-test"
+    assert request["messages"][0] == {"role": "system", "content": "be brief"}
+    assert "response_format" not in request
+
+
+def test_response_schema_maps_to_json_schema_format(provider):
+    schema = {"type": "object", "required": ["name"]}
+    provider.ask("who?", response_schema=schema)
+    assert FakeOpenAIHandler.requests[0]["response_format"] == {
+        "type": "json_schema",
+        "json_schema": {"name": "answer", "schema": schema},
+    }
+
+
+def test_fails_over_to_backup_model_on_5xx(provider):
+    assert provider.ask("hello", model="down") == "HELLO"
+    assert [r["model"] for r in FakeOpenAIHandler.requests] == ["down", "gpt-backup"]
+
+
+def test_all_models_down_raises_provider_error(provider):
+    provider.backup_models = ["down"]
+    with pytest.raises(ProviderError):
+        provider.ask("hello", model="down")
+
+
+def test_client_errors_map_to_provider_error_without_failover(provider):
+    with pytest.raises(ProviderError):
+        provider.ask("hello", model="bad")
+    assert [r["model"] for r in FakeOpenAIHandler.requests] == ["bad"]
+
+
+def test_deadline_bounds_sdk_call(provider):
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceededError):
+        provider.ask("sleep 1", deadline=Deadline(0.3))
+    assert time.monotonic() - start < 0.9
+
+
+def test_deadline_turns_off_sdk_retries(provider):
+    provider.client = provider.client.with_options(max_retries=2)
+    provider.backup_models = []
+    with pytest.raises(ProviderError):
+        provider.ask("hello", model="down", deadline=Deadline(10))
+    assert [r["model"] for r in FakeOpenAIHandler.requests] == ["down"]
+
+
+def test_deadline_without_limit_keeps_client_timeout(provider):
+    provider.client = provider.client.with_options(timeout=0.2)
+    with pytest.raises(ProviderError):
+        provider.ask("sleep 1", use_backups=False, deadline=Deadline())
+    assert provider.ask("hello", deadline=Deadline()) == "HELLO"
@@ -1,4 +1,5 @@
-from ai_handler.question import SimpleQuestion
+from ai_handler.question import JsonQuestion, SimpleQuestion
+from ai_handler.schema import JsonSchema
 
 
 def test_simple_question_basic_properties():
@@ -27,3 +28,10 @@ def test_simple_question_on_retry_increases_prompt(monkeypatch):
 def test_simple_question_max_retries():
     q = SimpleQuestion("will it retry?")
     assert q.max_retries == 3
+
+
+def test_json_question_exposes_schema():
+    q = JsonQuestion("who?", {"type": "object"})
+    assert isinstance(q.response_schema, JsonSchema)
+    assert '{"type": "object"}' in q.prompt
+    assert SimpleQuestion("plain?").response_schema is None
@@ -0,0 +1,155 @@
+import pytest
+from ai_handler.providers.ai_provider_client import AiProviderClient
+from ai_handler.providers.router import (
+    Cheapest,
+    CheapestUnderLatency,
+    Fastest,
+    RouteBackend,
+    RoutingClient,
+)
+from ai_handler.deadline import Deadline
+from ai_handler.errors import DeadlineExceededError, ProviderError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class StubBackend(AiProviderClient):
+    def __init__(self, name: str, clock: FakeClock, latency: float, fail: bool = False):
+        self.name = name
+        self.clock = clock
+        self.latency = latency
+        self.fail = fail
+        self.calls = []
+
+    def ask(self, prompt: str, **kwargs) -> str:
+        self.calls.append(kwargs)
+        self.clock.now += self.latency
+        if self.fail:
+            raise ProviderError(f"{self.name} is down")
+        return self.name
+
+
+def make_router(policy, **latencies):
+    clock = FakeClock()
+    stubs = {name: StubBackend(name, clock, latency) for name, latency in latencies.items()}
+    backends = [
+        RouteBackend(name, stub, cost_per_token=cost)
+        for cost, (name, stub) in enumerate(stubs.items(), start=1)
+    ]
+    return RoutingClient(backends, policy=policy, clock=clock), stubs, clock
+
+
+def test_fastest_policy_shifts_traffic_to_faster_backend():
+    router, stubs, _ = make_router(Fastest(), slow=2.0, fast=0.5)
+    answers = [router.ask("hi") for _ in range(4)]
+    # both are sampled while unmeasured, then the fast one wins
+    assert answers[-1] == "fast"
+    assert router.stats["fast"].latency == pytest.approx(0.5)
+
+
+def test_fastest_policy_reacts_to_vendor_slowdown():
+    router, stubs, _ = make_router(Fastest(), a=0.1, b=0.5)
+    for _ in range(3):
+        router.ask("hi")
+    assert router.ask("hi") == "a"
+    stubs["a"].latency = 5.0
+    router.ask("hi")
+    assert router.ask("hi") == "b"
+
+
+def test_cheapest_under_latency_policy():
+    router, stubs, _ = make_router(CheapestUnderLatency(1.0), cheap=3.0, pricey=0.2)
+    router.ask("warm")
+    router.ask("warm")
+    assert router.ask("hi") == "pricey"
+
+def test_cheapest_policy():
+    router, _, _ = make_router(Cheapest(), cheap=1.0, pricey=0.1)
+    assert router.ask("hi") == "cheap"
+    assert router.stats["cheap"].estimated_cost == pytest.approx((2 + 5) / 4 * 1)
+
+
+def test_failover_and_error_rate_demotion():
+    router, stubs, clock = make_router(Cheapest(), primary=0.1, secondary=0.1)
+    stubs["primary"].fail = True
+    assert router.ask("hi") == "secondary"
+    for _ in range(5):
+        router.ask("hi")
+    stats = router.stats["primary"]
+    assert stats.error_rate > router.max_error_rate
+    calls_before = len(stubs["primary"].calls)
+    assert router.ask("hi") == "secondary"
+    assert len(stubs["primary"].calls) == calls_before
+    # the error rate decays, so the recovered vendor gets traffic again
+    stubs["primary"].fail = False
+    clock.now += 10 * router.error_half_life
+    assert router.ask("hi") == "primary"
+
+
+def test_all_backends_failing_raises_provider_error():
+    router, stubs, _ = make_router(Fastest(), a=0.1, b=0.1)
+    for stub in stubs.values():
+        stub.fail = True
+    with pytest.raises(ProviderError):
+        router.ask("hi")
+
+
+def test_backend_kwargs_are_merged_under_call_kwargs():
+    clock = FakeClock()
+    stub = StubBackend("a", clock, 0.1)
+    router = RoutingClient(
+        [RouteBackend("a", stub, kwargs={"model": "m1", "temperature": 0.1})], clock=clock
+    )
+    router.ask("hi", temperature=0.9)
+    assert stub.calls == [{"model": "m1", "temperature": 0.9}]
+
+
+def test_backend_names_must_be_unique():
+    stub = StubBackend("a", FakeClock(), 0.1)
+    with pytest.raises(ValueError):
+        RoutingClient([RouteBackend("a", stub), RouteBackend("a", stub)])
+
+
+def test_deadline_errors_are_not_counted_against_backend():
+    class TimingOut(AiProviderClient):
+        def ask(self, prompt: str, **kwargs) -> str:
+            raise DeadlineExceededError("too slow")
+
+    router = RoutingClient([RouteBackend("a", TimingOut())])
+    with pytest.raises(DeadlineExceededError):
+        router.ask("hi", deadline=Deadline(10))
+    assert router.stats["a"].errors == 0
+    with pytest.raises(DeadlineExceededError):
+        router.ask("hi", deadline=Deadline(0))
+
+
+def test_idle_backend_is_probed_so_latency_recovers():
+    router, stubs, clock = make_router(Fastest(), a=5.0, b=1.0)
+    router.ask("hi")
+    router.ask("hi")
+    assert router.ask("hi") == "b"
+    stubs["a"].latency = 0.1
+    clock.now += router.probe_interval
+    assert router.ask("hi") == "a"
+    for _ in range(20):
+        clock.now += router.probe_interval
+        router.ask("hi")
+    assert router.stats["a"].latency < router.stats["b"].latency
+    # b is idle by now, so the next request probes it before traffic settles on a
+    assert router.ask("hi") == "b"
+    assert router.ask("hi") == "a"
+
+
+def test_probing_can_be_disabled():
+    router, stubs, clock = make_router(Fastest(), a=5.0, b=1.0)
+    router.probe_interval = None
+    router.ask("hi")
+    router.ask("hi")
+    clock.now += 1000
+    assert router.ask("hi") == "b"
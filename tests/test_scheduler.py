@@ -0,0 +1,180 @@
+import threading
+import time
+import pytest
+from ai_handler.scheduler import Priority, Scheduler
+from ai_handler.deadline import Deadline
+from ai_handler.errors import RequestCancelledError, SchedulerOverloadedError
+
+
+def wait_for(predicate, timeout=5.0):
+    end = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < end, "condition not reached"
+        time.sleep(0.005)
+
+
+class Blocker:
+    """Occupies the scheduler's only slot until released."""
+
+    def __init__(self, scheduler):
+        self.release = threading.Event()
+        self.thread = threading.Thread(
+            target=scheduler.run, args=(lambda: self.release.wait(5),)
+        )
+        self.thread.start()
+        wait_for(lambda: scheduler.metrics.in_flight == 1)
+
+    def stop(self):
+        self.release.set()
+        self.thread.join()
+
+
+def enqueue(scheduler, order, label, **kwargs):
+    depth = scheduler.metrics.queue_depth
+    thread = threading.Thread(
+        target=scheduler.run, args=(lambda: order.append(label),), kwargs=kwargs
+    )
+    thread.start()
+    wait_for(lambda: scheduler.metrics.queue_depth == depth + 1)
+    return thread
+
+
+def test_in_flight_calls_are_bounded():
+    scheduler = Scheduler(max_in_flight=3)
+    lock = threading.Lock()
+    current = [0]
+    peak = [0]
+
+    def call():
+        with lock:
+            current[0] += 1
+            peak[0] = max(peak[0], current[0])
+        time.sleep(0.01)
+        with lock:
+            current[0] -= 1
+
+    threads = [threading.Thread(target=scheduler.run, args=(call,)) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 3
+    metrics = scheduler.metrics
+    assert metrics.completed == 20 and metrics.in_flight == 0 and metrics.queue_depth == 0
+
+
+def test_higher_priority_is_served_first():
+    scheduler = Scheduler(max_in_flight=1)
+    blocker = Blocker(scheduler)
+    order = []
+    threads = [
+        enqueue(scheduler, order, "bulk", priority=Priority.BULK),
+        enqueue(scheduler, order, "default"),
+        enqueue(scheduler, order, "interactive", priority=Priority.INTERACTIVE),
+    ]
+    assert scheduler.metrics.queue_depth_by_priority == {0: 1, 1: 1, 2: 1}
+    blocker.stop()
+    for thread in threads:
+        thread.join()
+    assert order == ["interactive", "default", "bulk"]
+
+
+def test_weighted_fair_queuing_across_tenants():
+    scheduler = Scheduler(max_in_flight=1, tenant_weights={"interactive": 2})
+    blocker = Blocker(scheduler)
+    order = []
+    threads = [enqueue(scheduler, order, f"bulk{i}", tenant="backfill") for i in range(6)]
+    threads += [enqueue(scheduler, order, f"ui{i}", tenant="interactive") for i in range(4)]
+    blocker.stop()
+    for thread in threads:
+        thread.join()
+    # the later tenant is not stuck behind the whole backfill and gets twice the share
+    assert order[:6] == ["ui0", "bulk0", "ui1", "ui2", "bulk1", "ui3"]
+
+
+def test_shed_calls_do_not_count_against_fair_share():
+    scheduler = Scheduler(max_in_flight=1, max_queue_wait=0.002)
+    blocker = Blocker(scheduler)
+    for _ in range(20):
+        with pytest.raises(SchedulerOverloadedError):
+            scheduler.run(lambda: None, tenant="backfill")
+    scheduler.max_queue_wait = None
+    order = []
+    threads = [enqueue(scheduler, order, "bf", tenant="backfill")]
+    threads += [enqueue(scheduler, order, f"ui{i}", tenant="ui") for i in range(5)]
+    blocker.stop()
+    for thread in threads:
+        thread.join()
+    assert order[:2] == ["bf", "ui0"]
+
+
+def test_idle_tenants_are_forgotten():
+    scheduler = Scheduler(max_in_flight=1)
+    blocker = Blocker(scheduler)
+    order = []
+    threads = [enqueue(scheduler, order, i, tenant=f"t{i}") for i in range(10)]
+    threads.append(enqueue(scheduler, order, "again", tenant="t0"))
+    blocker.stop()
+    for thread in threads:
+        thread.join()
+    assert order[-1] == "again"
+    assert set(scheduler._tenant_finish) == {"t0"}
+
+
+def test_sheds_when_queue_is_full():
+    scheduler = Scheduler(max_in_flight=1, max_queue_depth=1)
+    blocker = Blocker(scheduler)
+    order = []
+    thread = enqueue(scheduler, order, "queued")
+    with pytest.raises(SchedulerOverloadedError):
+        scheduler.run(lambda: None)
+    blocker.stop()
+    thread.join()
+    assert order == ["queued"]
+    assert scheduler.metrics.shed == 1
+
+
+def test_sheds_fast_when_estimated_wait_exceeds_limit():
+    scheduler = Scheduler(max_in_flight=1, max_queue_wait=0.05)
+    scheduler.run(lambda: time.sleep(0.1))
+    blocker = Blocker(scheduler)
+    start = time.monotonic()
+    with pytest.raises(SchedulerOverloadedError):
+        scheduler.run(lambda: None)
+    assert time.monotonic() - start < 0.05
+    blocker.stop()
+
+
+def test_sheds_when_actual_wait_exceeds_limit():
+    scheduler = Scheduler(max_in_flight=1, max_queue_wait=0.05)
+    blocker = Blocker(scheduler)
+    with pytest.raises(SchedulerOverloadedError):
+        scheduler.run(lambda: None)
+    blocker.stop()
+    metrics = scheduler.metrics
+    assert metrics.shed == 1 and metrics.queue_depth == 0
+    scheduler.run(lambda: None)
+
+
+def test_queued_call_can_be_cancelled():
+    scheduler = Scheduler(max_in_flight=1)
+    blocker = Blocker(scheduler)
+    deadline = Deadline()
+    threading.Timer(0.02, deadline.cancel).start()
+    with pytest.raises(RequestCancelledError):
+        scheduler.run(lambda: None, deadline=deadline)
+    assert scheduler.metrics.queue_depth == 0
+    blocker.stop()
+
+
+def test_wait_time_metrics():
+    scheduler = Scheduler(max_in_flight=1)
+    blocker = Blocker(scheduler)
+    thread = enqueue(scheduler, [], "queued")
+    time.sleep(0.02)
+    blocker.stop()
+    thread.join()
+    metrics = scheduler.metrics
+    assert metrics.admitted == 2
+    assert metrics.wait_time_max >= 0.02
+    assert metrics.service_time_ewma is not None
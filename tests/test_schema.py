@@ -0,0 +1,94 @@
+import json
+import pytest
+from ai_handler.schema import JsonSchema, compile_schema, extract_json
+from ai_handler.errors import SchemaValidationError
+
+PERSON = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string", "minLength": 1},
+        "age": {"type": "integer", "minimum": 0},
+        "tags": {"type": "array", "items": {"type": "string"}, "maxItems": 2},
+        "role": {"enum": ["admin", "user"]},
+    },
+    "required": ["name", "age"],
+    "additionalProperties": False,
+}
+
+
+def test_schema_accepts_valid_value():
+    schema = JsonSchema(PERSON)
+    value = {"name": "Ada", "age": 36, "tags": ["x"], "role": "admin"}
+    assert schema.validate(value) is value
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        {"name": "Ada"},
+        {"name": "", "age": 1},
+        {"name": "Ada", "age": -1},
+        {"name": "Ada", "age": True},
+        {"name": "Ada", "age": 1.5},
+        {"name": "Ada", "age": 1, "tags": ["a", "b", "c"]},
+        {"name": "Ada", "age": 1, "tags": [1]},
+        {"name": "Ada", "age": 1, "role": "root"},
+        {"name": "Ada", "age": 1, "extra": 1},
+        ["not", "an", "object"],
+    ],
+)
+def test_schema_rejects_invalid_values(value):
+    with pytest.raises(SchemaValidationError):
+        JsonSchema(PERSON).validate(value)
+
+
+def test_schema_error_is_value_error_with_path():
+    with pytest.raises(ValueError) as info:
+        JsonSchema(PERSON).validate({"name": "Ada", "age": 1, "tags": [1]})
+    assert info.value.path == "$.tags[0]"
+
+
+def test_compile_schema_reuses_compiled_schema():
+    schema = JsonSchema(PERSON)
+    assert compile_schema(schema) is schema
+    assert compile_schema(PERSON) == schema
+
+
+def test_extract_json_plain():
+    assert extract_json(' {"a": 1} ') == {"a": 1}
+
+
+def test_extract_json_from_code_fence():
+    text = 'Here you go:\n```json\n{"a": [1, 2]}\n```\nAnything else?'
+    assert extract_json(text) == {"a": [1, 2]}
+
+
+def test_extract_json_from_prose():
+    text = 'Sure! The answer is {"a": {"b": "}"}} as requested.'
+    assert extract_json(text) == {"a": {"b": "}"}}
+
+
+def test_extract_json_raises_value_error():
+    with pytest.raises(json.JSONDecodeError):
+        extract_json("no json here")
+
+
+def test_extract_json_skips_candidates_that_fail_the_schema():
+    schema = JsonSchema({"type": "object", "required": ["name"]})
+    text = 'Per [1], the answer is {"name": "Ada"}'
+    assert extract_json(text) == [1]
+    assert extract_json(text, schema) == {"name": "Ada"}
+
+
+def test_extract_json_reports_first_schema_error_when_nothing_matches():
+    schema = JsonSchema({"type": "object", "required": ["name"]})
+    with pytest.raises(SchemaValidationError):
+        extract_json('Per [1], the answer is {"wrong": 1}', schema)
+
+
+def test_integer_accepts_integral_floats():
+    schema = JsonSchema({"type": "integer"})
+    assert schema.validate(1.0) == 1.0
+    with pytest.raises(SchemaValidationError):
+        schema.validate(1.5)
+    assert JsonSchema({"type": ["integer", "number"]}).validate(1.5) == 1.5